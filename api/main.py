@@ -1,22 +1,31 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import time
 from datetime import UTC, datetime
 
+import orjson
 import sentry_sdk
 from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from redis import Redis
+from redis.asyncio.client import PubSub
+from starlette.concurrency import run_in_threadpool
 
 from api.queue import RedisRunQueue, RunQueue
 from shared.constants import BUILTIN_PACK_IDS, RUN_LIMITS, TERMINAL_STATUSES
 from shared.packs import build_pack_descriptors
-from shared.rate_limit import allow_request
-from shared.redis_client import get_redis
-from shared.settings import API_RATE_LIMIT_PER_MINUTE, CORS_ALLOW_ORIGINS, SENTRY_DSN
-from shared.store import RunStore
+from shared.rate_limit import allow_request, queue_rate_limit
+from shared.redis_client import (
+    get_async_redis,
+    get_async_redis_pubsub,
+    get_async_redis_raw,
+    get_redis,
+    get_redis_raw,
+)
+from shared.settings import API_RATE_LIMIT_PER_MINUTE, CORS_ALLOW_ORIGINS_LIST, SENTRY_DSN
+from shared.store import AsyncRunStore, RunStore
 from shared.types import RunCreateRequest, RunSummary, UploadResponse
 from shared.validation import UploadValidationError, validate_upload
 
@@ -24,13 +33,63 @@ from shared.validation import UploadValidationError, validate_upload
 if SENTRY_DSN:
     sentry_sdk.init(dsn=SENTRY_DSN, traces_sample_rate=0.0)
 
+SSE_KEEPALIVE_SECONDS = 15.0
+UPLOAD_READ_CHUNK_BYTES = 64 * 1024
+_UPLOAD_MAX_BYTES = RUN_LIMITS["upload_max_bytes"]
+_CONCURRENT_RUNS_MAX = RUN_LIMITS["concurrent_runs_max"]
 
-def create_app(store: RunStore | None = None, queue: RunQueue | None = None) -> FastAPI:
+_last_iso_second: tuple[int, str] = (0, "")
+
+
+def _iso_now() -> str:
+    """Second-resolution ISO timestamp, formatted at most once per wall-clock second."""
+    global _last_iso_second
+    second = int(time.time())
+    cached_second, cached = _last_iso_second
+    if cached_second != second:
+        cached = datetime.fromtimestamp(second, UTC).isoformat()
+        _last_iso_second = (second, cached)
+    return cached
+
+
+async def _read_upload(file: UploadFile) -> bytearray:
+    """Read the upload in chunks, rejecting it as soon as it passes the size limit."""
+    content = bytearray()
+    while chunk := await file.read(UPLOAD_READ_CHUNK_BYTES):
+        content.extend(chunk)
+        if len(content) > _UPLOAD_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"File exceeds {_UPLOAD_MAX_BYTES} bytes")
+    return content
+
+
+async def _wait_for_disconnect(request: Request) -> None:
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def _wait_for_notification(pubsub: PubSub, timeout: float) -> bool:
+    """Wait until the run publishes a notification, draining any backlog; False on timeout."""
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        if await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining) is not None:
+            while await pubsub.get_message(ignore_subscribe_messages=True, timeout=0.0) is not None:
+                pass
+            return True
+    return False
+
+
+def create_app(
+    store: RunStore | None = None,
+    queue: RunQueue | None = None,
+    async_store: AsyncRunStore | None = None,
+) -> FastAPI:
     app = FastAPI(title="MicroLLM Lab API", version="0.1.0")
 
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=[origin.strip() for origin in CORS_ALLOW_ORIGINS.split(",") if origin.strip()],
+        allow_origins=CORS_ALLOW_ORIGINS_LIST,
         allow_methods=["*"],
         allow_headers=["*"],
         allow_credentials=False,
@@ -38,31 +97,37 @@ def create_app(store: RunStore | None = None, queue: RunQueue | None = None) ->
 
     redis = store.redis if store else get_redis()
     app.state.redis = redis
-    app.state.store = store or RunStore(redis)
-    app.state.queue = queue or RedisRunQueue()
-
-    def _store(request: Request) -> RunStore:
-        return request.app.state.store
-
-    def _redis(request: Request) -> Redis:
-        return request.app.state.redis
+    app.state.store = store or RunStore(redis, get_redis_raw())
+    app.state.queue = queue or RedisRunQueue(get_redis_raw())
+    app.state.async_store = async_store or AsyncRunStore(
+        app.state.store, get_async_redis(), get_async_redis_raw(), get_async_redis_pubsub()
+    )
+    # Pack descriptors only depend on the bundled pack files, so serialize them once.
+    app.state.packs = [pack.model_dump(mode="json") for pack in build_pack_descriptors()]
 
-    def _queue(request: Request) -> RunQueue:
-        return request.app.state.queue
+    # These never change after startup; endpoints close over them directly.
+    redis_client: Redis = app.state.redis
+    store_client: RunStore = app.state.store
+    queue_client: RunQueue = app.state.queue
+    async_store_client: AsyncRunStore = app.state.async_store
+    packs_body = orjson.dumps(app.state.packs)
 
     @app.get("/health")
     def health() -> dict[str, str]:
         return {"status": "ok"}
 
     @app.get("/api/v1/packs")
-    def list_packs() -> list[dict]:
-        return [pack.model_dump(mode="json") for pack in build_pack_descriptors()]
+    def list_packs() -> Response:
+        # Pre-encoded once; skips FastAPI's per-request encode of the static list.
+        return Response(content=packs_body, media_type="application/json")
 
     @app.post("/api/v1/uploads", response_model=UploadResponse)
     async def create_upload(request: Request, file: UploadFile = File(...)) -> UploadResponse:
-        redis_client = _redis(request)
+        # Async for the chunked read, so the sync Redis calls go to the threadpool rather than
+        # blocking the event loop that also serves every SSE stream.
         ip = request.client.host if request.client else "unknown"
-        if not allow_request(
+        if not await run_in_threadpool(
+            allow_request,
             redis_client,
             key=f"rl:upload:{ip}",
             limit=API_RATE_LIMIT_PER_MINUTE,
@@ -71,14 +136,15 @@ def create_app(store: RunStore | None = None, queue: RunQueue | None = None) ->
             raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
         filename = file.filename or "upload.txt"
-        content = await file.read()
+        content = await _read_upload(file)
         try:
             text = validate_upload(filename, content)
         except UploadValidationError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
 
-        store_client = _store(request)
-        upload_id, expires_at, doc_count, char_count = store_client.create_upload(text)
+        upload_id, expires_at, doc_count, char_count = await run_in_threadpool(
+            store_client.create_upload, text
+        )
         return UploadResponse(
             upload_id=upload_id,
             document_count=doc_count,
@@ -88,60 +154,59 @@ def create_app(store: RunStore | None = None, queue: RunQueue | None = None) ->
 
     @app.post("/api/v1/runs", response_model=RunSummary)
     def create_run(request: Request, body: RunCreateRequest) -> RunSummary:
-        redis_client = _redis(request)
         ip = request.client.host if request.client else "unknown"
-        if not allow_request(
-            redis_client,
-            key=f"rl:runs:{ip}",
-            limit=API_RATE_LIMIT_PER_MINUTE,
-            window_seconds=60,
-        ):
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        pack_id = body.pack_id
+        upload_id = pack_id.split("upload:", 1)[1] if pack_id.startswith("upload:") else None
+
+        # Rate-limit check, active-run count and upload lookup share one round-trip.
+        pipe = redis_client.pipeline()
+        queue_rate_limit(pipe, key=f"rl:runs:{ip}", window_seconds=60)
+        store_client.count_active_runs_cmd(pipe)
+        if upload_id is not None:
+            store_client.upload_exists_cmd(pipe, upload_id)
+        request_count, _, _, active_runs, *upload_found = pipe.execute()
 
-        store_client = _store(request)
-        if store_client.count_active_runs() >= RUN_LIMITS["concurrent_runs_max"]:
+        if request_count > API_RATE_LIMIT_PER_MINUTE:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded")
+        if active_runs >= _CONCURRENT_RUNS_MAX:
             raise HTTPException(
                 status_code=429,
-                detail=f"Max concurrent runs is {RUN_LIMITS['concurrent_runs_max']}",
+                detail=f"Max concurrent runs is {_CONCURRENT_RUNS_MAX}",
             )
 
-        pack_id = body.pack_id
-        if pack_id not in BUILTIN_PACK_IDS and not pack_id.startswith("upload:"):
+        if pack_id not in BUILTIN_PACK_IDS and upload_id is None:
             raise HTTPException(status_code=400, detail=f"Unsupported pack_id: {pack_id}")
-
-        if pack_id.startswith("upload:"):
-            upload_id = pack_id.split("upload:", 1)[1]
-            if not store_client.get_upload_text(upload_id):
-                raise HTTPException(status_code=404, detail="Upload not found or expired")
+        if upload_id is not None and not upload_found[0]:
+            raise HTTPException(status_code=404, detail="Upload not found or expired")
 
         run = store_client.create_run(pack_id=pack_id, config=body.config)
-        queue_client = _queue(request)
         queue_client.enqueue_run(run.run_id)
         return run
 
     @app.get("/api/v1/runs/{run_id}", response_model=RunSummary)
-    def get_run(run_id: str, request: Request) -> RunSummary:
-        run = _store(request).get_run(run_id)
+    def get_run(run_id: str) -> RunSummary:
+        run = store_client.get_run(run_id)
         if run is None:
             raise HTTPException(status_code=404, detail="Run not found")
         return run
 
     @app.post("/api/v1/runs/{run_id}/cancel")
-    def cancel_run(run_id: str, request: Request) -> dict[str, str]:
-        store_client = _store(request)
-        run = store_client.get_run(run_id)
+    def cancel_run(run_id: str) -> dict[str, str]:
+        run = store_client.get_run(run_id, use_cache=False)
         if run is None:
             raise HTTPException(status_code=404, detail="Run not found")
         if run.status in TERMINAL_STATUSES:
             return {"status": run.status}
 
         store_client.request_cancel(run_id)
-        store_client.update_run_status(run_id, "canceled")
+        # Event before status, as the worker does: a stream that wakes on the status change
+        # and sees a terminal run stops reading, so the event must already be there.
         store_client.append_event(
             run_id,
             "run.canceled",
-            {"requested_at": datetime.now(UTC).isoformat()},
+            {"requested_at": _iso_now()},
         )
+        store_client.update_run_status(run_id, "canceled")
         return {"status": "cancel_requested"}
 
     @app.get("/api/v1/runs/{run_id}/events")
@@ -150,8 +215,7 @@ def create_app(store: RunStore | None = None, queue: RunQueue | None = None) ->
         request: Request,
         from_seq: int = Query(default=1, ge=1),
     ) -> StreamingResponse:
-        store_client = _store(request)
-        run = store_client.get_run(run_id)
+        run = await async_store_client.get_run(run_id)
         if run is None:
             raise HTTPException(status_code=404, detail="Run not found")
 
@@ -163,24 +227,46 @@ def create_app(store: RunStore | None = None, queue: RunQueue | None = None) ->
                 pass
 
         async def event_generator():
+            # Subscribe before the first read so no notification slips between the two.
+            pubsub = await async_store_client.subscribe_events(run_id)
+            disconnected = asyncio.create_task(_wait_for_disconnect(request))
+            notification: asyncio.Task | None = None
             cursor = from_seq
-            while True:
-                if await request.is_disconnected():
-                    return
-
-                events = store_client.list_events(run_id, from_seq=cursor)
-                for event in events:
-                    cursor = event["seq"] + 1
-                    payload = json.dumps(event)
-                    yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {payload}\n\n"
-
-                run_state = store_client.get_run(run_id)
-                if run_state and run_state.status in TERMINAL_STATUSES and not events:
-                    return
-
-                if not events:
-                    yield ": ping\n\n"
-                    await asyncio.sleep(0.5)
+            try:
+                while not disconnected.done():
+                    events, status = await async_store_client.poll_events(run_id, from_seq=cursor)
+                    if events:
+                        # One chunk per batch keeps replay after reconnect to a single send.
+                        cursor = events[-1]["seq"] + 1
+                        yield "".join(
+                            f"id: {event['seq']}\nevent: {event['type']}\ndata: {event['data']}\n\n"
+                            for event in events
+                        )
+                        continue
+
+                    if status in TERMINAL_STATUSES:
+                        return
+
+                    notification = asyncio.create_task(
+                        _wait_for_notification(pubsub, SSE_KEEPALIVE_SECONDS)
+                    )
+                    await asyncio.wait(
+                        {disconnected, notification}, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if not notification.done():
+                        return
+                    if not notification.result():
+                        yield ": ping\n\n"
+            finally:
+                disconnected.cancel()
+                if notification is not None and not notification.done():
+                    # Also reached when Starlette cancels the generator on disconnect. Let the
+                    # read unwind before the pubsub connection is closed.
+                    notification.cancel()
+                    await asyncio.wait({notification})
+                # Shielded so the connection still goes back to the pool if the response
+                # task is being cancelled.
+                await asyncio.shield(pubsub.aclose())
 
         return StreamingResponse(
             event_generator(),
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import Protocol
 
+from redis import Redis
 from rq import Queue
 
 from shared.constants import RUN_LIMITS
-from shared.redis_client import get_redis_raw
 
 
 class RunQueue(Protocol):
@@ -14,16 +14,20 @@ class RunQueue(Protocol):
 
 
 class RedisRunQueue:
-    def __init__(self):
-        # RQ job payloads are binary-serialized; use a raw Redis client here.
-        self.queue = Queue("microllm", connection=get_redis_raw())
+    def __init__(self, redis: Redis):
+        # RQ job payloads are binary-serialized; pass a raw (non-decoding) Redis client.
+        self.queue = Queue("microllm", connection=redis)
 
     def enqueue_run(self, run_id: str) -> str:
-        job = self.queue.enqueue(
-            "worker.jobs.train_run_job",
-            run_id,
-            job_timeout=60 * 120,
-            result_ttl=RUN_LIMITS["ttl_seconds"],
-            failure_ttl=RUN_LIMITS["ttl_seconds"],
-        )
+        # Share one pipeline so the queue registration and job writes go out together.
+        with self.queue.connection.pipeline() as pipe:
+            job = self.queue.enqueue_call(
+                "worker.jobs.train_run_job",
+                args=(run_id,),
+                timeout=60 * 120,
+                result_ttl=RUN_LIMITS["ttl_seconds"],
+                failure_ttl=RUN_LIMITS["ttl_seconds"],
+                pipeline=pipe,
+            )
+            pipe.execute()
         return job.id
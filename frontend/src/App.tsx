@@ -38,7 +38,7 @@ type AttentionFrame = {
 type NormFrame = { step: number; values: Record<string, number> };
 type OpGraph = {
   step: number;
-  nodes: Array<{ id: number; value: number; grad: number }>;
+  nodes: Array<{ id: number; op?: string; shape?: number[]; value: number; grad: number }>;
   edges: Array<{ source: number; target: number }>;
 };
 
@@ -833,6 +833,7 @@ export default function App() {
                   aria-current={index === highlightNodeIndex ? "true" : undefined}
                 >
                   <span>id:{node.id}</span>
+                  {node.op && <span>{node.op}{node.shape?.length ? `[${node.shape.join("×")}]` : ""}</span>}
                   <span>val:{node.value.toFixed(5)}</span>
                   <span>grad:{node.grad.toFixed(5)}</span>
                 </div>
@@ -15,6 +15,8 @@ PACK_ORDER = [
     "json",
 ]
 
+DIGIT_PAIRS = [(a, b) for a in range(10) for b in range(10)]
+
 
 def _ensure_size(name: str, rows: list[str]) -> list[str]:
     unique_rows = list(dict.fromkeys(rows))
@@ -24,23 +26,9 @@ def _ensure_size(name: str, rows: list[str]) -> list[str]:
 
 
 def generate_arithmetic() -> list[str]:
-    add_no_carry = [
-        f"{a}+{b}={a+b}"
-        for a in range(10)
-        for b in range(10)
-        if a + b < 10
-    ][:20]
-    add_carry = [
-        f"{a}+{b}={a+b}"
-        for a in range(10)
-        for b in range(10)
-        if a + b >= 10
-    ][:20]
-    sub_rows = [
-        f"{a}-{b}={a-b}"
-        for a in range(10)
-        for b in range(a + 1)
-    ][:20]
+    add_no_carry = [f"{a}+{b}={a+b}" for a, b in DIGIT_PAIRS if a + b < 10][:20]
+    add_carry = [f"{a}+{b}={a+b}" for a, b in DIGIT_PAIRS if a + b >= 10][:20]
+    sub_rows = [f"{a}-{b}={a-b}" for a, b in DIGIT_PAIRS if b <= a][:20]
     return _ensure_size("arithmetic", add_no_carry + add_carry + sub_rows)
 
 
@@ -212,12 +200,16 @@ def _pack_dir() -> Path:
     return Path(__file__).resolve().parents[1] / "packs"
 
 
+def _pack_bytes(rows: list[str]) -> bytes:
+    return ("\n".join(rows) + "\n").encode("utf-8")
+
+
 def write_packs() -> None:
     pack_dir = _pack_dir()
     packs = generate_all_packs()
     for pack_id in PACK_ORDER:
         path = pack_dir / f"{pack_id}.txt"
-        path.write_text("\n".join(packs[pack_id]) + "\n", encoding="utf-8")
+        path.write_bytes(_pack_bytes(packs[pack_id]))
 
 
 def check_packs() -> int:
@@ -225,12 +217,12 @@ def check_packs() -> int:
     packs = generate_all_packs()
     mismatches: list[str] = []
     for pack_id in PACK_ORDER:
-        expected = "\n".join(packs[pack_id]) + "\n"
+        expected = _pack_bytes(packs[pack_id])
         path = pack_dir / f"{pack_id}.txt"
         if not path.exists():
             mismatches.append(f"{pack_id}: missing file {path}")
             continue
-        current = path.read_text(encoding="utf-8")
+        current = path.read_bytes()
         if current != expected:
             mismatches.append(f"{pack_id}: file content differs from generated output")
     if mismatches:
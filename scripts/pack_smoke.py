@@ -2,10 +2,19 @@
 from __future__ import annotations
 
 import argparse
+import os
 import statistics
 import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+# Parallelism comes from --jobs processes; the smoke models are far too small to gain from
+# BLAS threads, and one thread pool per process would oversubscribe the cores. Must be set
+# before NumPy is imported (the worker processes inherit it).
+for _var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(_var, "1")
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -19,7 +28,7 @@ PACK_IDS = ["regex", "abc_music", "chess_pgn", "sql_snippets", "arithmetic", "js
 
 def run_pack_smoke(pack_id: str, steps: int) -> None:
     docs = resolve_docs(pack_id, upload_text=None)
-    losses: list[float] = []
+    losses = array("d")
     has_non_empty_sample = False
 
     config = RunConfig(
@@ -85,11 +94,25 @@ def main() -> int:
         choices=PACK_IDS,
         help="Optional pack ID to run (can be provided multiple times).",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Packs to train in parallel (default: CPU count)",
+    )
     args = parser.parse_args()
 
     selected = args.pack if args.pack else PACK_IDS
-    for pack_id in selected:
-        run_pack_smoke(pack_id, steps=args.steps)
+    workers = max(1, min(len(selected), args.jobs))
+    if workers == 1:
+        for pack_id in selected:
+            run_pack_smoke(pack_id, steps=args.steps)
+    else:
+        # Packs train independently and are CPU-bound, so run them in separate processes.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_pack_smoke, pack_id, args.steps) for pack_id in selected]
+            for future in as_completed(futures):
+                future.result()
 
     print("Pack smoke checks passed.")
     return 0
@@ -1,20 +1,56 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import json
 import re
 import sys
 from pathlib import Path
 
+import orjson
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from scripts.generate_packs import PACK_ORDER, TARGET_LINES, generate_all_packs
 
+ARITHMETIC_PATTERN = re.compile(r"^(\d)([+-])(\d)=(\d{1,2})$")
+
+CHESS_PATTERN = re.compile(r"^1\. (\S+) (\S+) 2\. (\S+) (\S+) 3\. (\S+) (\S+)$")
+CHESS_MOVE_PATTERN = re.compile(r"^[A-Za-z0-9+#=x]+$")
+
+ABC_SCALAR = frozenset({"CDEF", "DEFG", "EFGA", "FGAB", "GABC", "ABCD", "BCDE", "DCBA", "EDCB", "FEDC"})
+ABC_ARPEGGIO = frozenset({"CEGC", "DFAF", "EGBE", "FACE", "GBDG", "ACEA", "BDFB", "CEAC", "DFAD", "EGBD"})
+ABC_ALTERNATING = frozenset({"CDCD", "EFEF", "GAGA", "BGBG", "ACAC", "DFDF", "EAEA", "FGFG", "ABAB", "BCBC"})
+ABC_PATTERN = re.compile(r"^X:(\d+) K:([CGDFA]) \|([A-G]{4})\|([A-G]{4})\|([A-G]{4})\|([A-G]{4})\|$")
+
+SQL_TABLE_BY_BLOCK = ("users", "orders", "products", "sessions")
+SQL_ALLOWED_TABLES = frozenset(SQL_TABLE_BY_BLOCK)
+SQL_ALLOWED_COLS = frozenset({"id", "name", "email", "total", "stock", "status", "age", "score"})
+SQL_ALLOWED_FIELDS = frozenset({"active", "status", "stock", "age", "score", "total", "valid"})
+SQL_PATTERN = re.compile(
+    r"^SELECT ([a-z]+) FROM (users|orders|products|sessions) WHERE ([a-z]+)(>=|<=|=|>|<)(\d{1,3});$"
+)
+
+REGEX_ALLOWED_CLASSES = frozenset({"[a-z]", "[a-z0-9]", "[A-Z]", "[A-Za-z]", "[A-Za-z0-9]"})
+REGEX_ALLOWED_DOMAINS = frozenset(
+    {"gmail.com", "yahoo.com", "outlook.com", "company.org", "school.edu", "proton.me"}
+)
+REGEX_PATTERN = re.compile(r"^\^(\[[A-Za-z0-9-]+\])\+@(.+)\$$")
+
+JSON_ALLOWED_PAIRS = frozenset(
+    {
+        ("name", "age"),
+        ("city", "pop"),
+        ("item", "price"),
+        ("team", "rank"),
+        ("model", "score"),
+    }
+)
+
 
 def _read_lines(path: Path) -> list[str]:
-    return [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    stripped = (line.strip() for line in path.read_text(encoding="utf-8").splitlines())
+    return [line for line in stripped if line]
 
 
 def _fail(msg: str) -> None:
@@ -22,9 +58,8 @@ def _fail(msg: str) -> None:
 
 
 def _check_arithmetic(lines: list[str]) -> None:
-    pattern = re.compile(r"^(\d)([+-])(\d)=(\d{1,2})$")
     for idx, line in enumerate(lines):
-        match = pattern.match(line)
+        match = ARITHMETIC_PATTERN.match(line)
         if not match:
             _fail(f"arithmetic: invalid template at line {idx + 1}: {line}")
         a = int(match.group(1))
@@ -50,17 +85,15 @@ def _check_arithmetic(lines: list[str]) -> None:
 
 
 def _check_chess(lines: list[str]) -> None:
-    pattern = re.compile(r"^1\. (\S+) (\S+) 2\. (\S+) (\S+) 3\. (\S+) (\S+)$")
-    move_pattern = re.compile(r"^[A-Za-z0-9+#=x]+$")
     for idx, line in enumerate(lines):
         parts = line.split()
         if len(parts) != 9 or parts[0] != "1." or parts[3] != "2." or parts[6] != "3.":
             _fail(f"chess_pgn: invalid move-number token layout at line {idx + 1}")
-        match = pattern.match(line)
+        match = CHESS_PATTERN.match(line)
         if not match:
             _fail(f"chess_pgn: invalid template at line {idx + 1}: {line}")
         moves = [match.group(i) for i in range(1, 7)]
-        if not all(move_pattern.match(move) for move in moves):
+        if not all(CHESS_MOVE_PATTERN.match(move) for move in moves):
             _fail(f"chess_pgn: invalid move token at line {idx + 1}")
 
         w1, b1 = moves[0], moves[1]
@@ -75,13 +108,8 @@ def _check_chess(lines: list[str]) -> None:
 
 
 def _check_abc(lines: list[str]) -> None:
-    scalar = {"CDEF", "DEFG", "EFGA", "FGAB", "GABC", "ABCD", "BCDE", "DCBA", "EDCB", "FEDC"}
-    arpeggio = {"CEGC", "DFAF", "EGBE", "FACE", "GBDG", "ACEA", "BDFB", "CEAC", "DFAD", "EGBD"}
-    alternating = {"CDCD", "EFEF", "GAGA", "BGBG", "ACAC", "DFDF", "EAEA", "FGFG", "ABAB", "BCBC"}
-    pattern = re.compile(r"^X:(\d+) K:([CGDFA]) \|([A-G]{4})\|([A-G]{4})\|([A-G]{4})\|([A-G]{4})\|$")
-
     for idx, line in enumerate(lines):
-        match = pattern.match(line)
+        match = ABC_PATTERN.match(line)
         if not match:
             _fail(f"abc_music: invalid template at line {idx + 1}: {line}")
         n = int(match.group(1))
@@ -90,27 +118,19 @@ def _check_abc(lines: list[str]) -> None:
             _fail(f"abc_music: X index must be sequential (line {idx + 1})")
 
         if idx < 20:
-            if not (b1 == b3 and b2 == b4 and b1 in scalar and b2 in scalar):
+            if not (b1 == b3 and b2 == b4 and b1 in ABC_SCALAR and b2 in ABC_SCALAR):
                 _fail(f"abc_music: scalar block invalid at line {idx + 1}")
         elif idx < 40:
-            if not (b1 == b2 and b3 == b4 and b1 in arpeggio and b3 in arpeggio):
+            if not (b1 == b2 and b3 == b4 and b1 in ABC_ARPEGGIO and b3 in ABC_ARPEGGIO):
                 _fail(f"abc_music: arpeggio block invalid at line {idx + 1}")
         else:
-            if not (b1 == b3 and b2 == b4 and b1 in alternating and b2 in alternating):
+            if not (b1 == b3 and b2 == b4 and b1 in ABC_ALTERNATING and b2 in ABC_ALTERNATING):
                 _fail(f"abc_music: alternating block invalid at line {idx + 1}")
 
 
 def _check_sql(lines: list[str]) -> None:
-    allowed_tables = {"users", "orders", "products", "sessions"}
-    allowed_cols = {"id", "name", "email", "total", "stock", "status", "age", "score"}
-    allowed_fields = {"active", "status", "stock", "age", "score", "total", "valid"}
-    pattern = re.compile(
-        r"^SELECT ([a-z]+) FROM (users|orders|products|sessions) WHERE ([a-z]+)(>=|<=|=|>|<)(\d{1,3});$"
-    )
-    table_by_block = ["users", "orders", "products", "sessions"]
-
     for idx, line in enumerate(lines):
-        match = pattern.match(line)
+        match = SQL_PATTERN.match(line)
         if not match:
             _fail(f"sql_snippets: invalid template at line {idx + 1}: {line}")
 
@@ -119,57 +139,46 @@ def _check_sql(lines: list[str]) -> None:
         field = match.group(3)
         value = int(match.group(5))
 
-        if col not in allowed_cols:
+        if col not in SQL_ALLOWED_COLS:
             _fail(f"sql_snippets: invalid column at line {idx + 1}")
-        if table not in allowed_tables:
+        if table not in SQL_ALLOWED_TABLES:
             _fail(f"sql_snippets: invalid table at line {idx + 1}")
-        if field not in allowed_fields:
+        if field not in SQL_ALLOWED_FIELDS:
             _fail(f"sql_snippets: invalid condition field at line {idx + 1}")
         if not (0 <= value <= 200):
             _fail(f"sql_snippets: condition value out of range at line {idx + 1}")
 
-        expected_table = table_by_block[idx // 15]
+        expected_table = SQL_TABLE_BY_BLOCK[idx // 15]
         if table != expected_table:
             _fail(f"sql_snippets: table grouping mismatch at line {idx + 1}")
 
 
 def _check_regex(lines: list[str]) -> None:
-    allowed_classes = {"[a-z]", "[a-z0-9]", "[A-Z]", "[A-Za-z]", "[A-Za-z0-9]"}
-    allowed_domains = {"gmail.com", "yahoo.com", "outlook.com", "company.org", "school.edu", "proton.me"}
-    pattern = re.compile(r"^\^(\[[A-Za-z0-9-]+\])\+@(.+)\$$")
-
     for idx, line in enumerate(lines):
-        match = pattern.match(line)
+        match = REGEX_PATTERN.match(line)
         if not match:
             _fail(f"regex: invalid template at line {idx + 1}: {line}")
         charclass = match.group(1)
         domain = match.group(2)
         normalized_domain = domain.replace(r"\.", ".")
 
-        if charclass not in allowed_classes:
+        if charclass not in REGEX_ALLOWED_CLASSES:
             _fail(f"regex: invalid charclass at line {idx + 1}")
-        if normalized_domain not in allowed_domains:
+        if normalized_domain not in REGEX_ALLOWED_DOMAINS:
             _fail(f"regex: invalid domain at line {idx + 1}")
 
 
 def _check_json(lines: list[str]) -> None:
-    allowed_pairs = {
-        ("name", "age"),
-        ("city", "pop"),
-        ("item", "price"),
-        ("team", "rank"),
-        ("model", "score"),
-    }
     for idx, line in enumerate(lines):
         try:
-            obj = json.loads(line)
-        except json.JSONDecodeError as exc:
+            obj = orjson.loads(line)
+        except orjson.JSONDecodeError as exc:
             _fail(f"json: invalid JSON at line {idx + 1}: {exc}")  # pragma: no cover
         keys = list(obj.keys())
         if len(keys) != 2:
             _fail(f"json: line {idx + 1} must have exactly 2 keys")
         pair = (keys[0], keys[1])
-        if pair not in allowed_pairs:
+        if pair not in JSON_ALLOWED_PAIRS:
             _fail(f"json: invalid key pair at line {idx + 1}")
         if not isinstance(obj[keys[0]], str):
             _fail(f"json: first value must be string at line {idx + 1}")
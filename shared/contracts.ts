@@ -14,6 +14,7 @@ export type RunConfig = {
   top_k: number;
   op_graph_token_index: number;
   op_graph_step_interval: number;
+  dtype?: "float32" | "float64";
 };
 
 export type RunSummary = {
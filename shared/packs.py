@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 
 from shared.constants import BUILTIN_PACK_IDS, PACK_DIR, RUN_LIMITS
 from shared.types import PackDescriptor
 
+_CORPUS_MAX_CHARS = RUN_LIMITS["corpus_max_chars"]
+
 PACK_METADATA = {
     "regex": {
         "title": "Regex Patterns",
@@ -34,25 +37,50 @@ PACK_METADATA = {
 }
 
 
-def _read_docs(path: Path) -> list[str]:
-    docs = [line.strip() for line in path.read_text(encoding="utf-8").splitlines()]
-    docs = [doc for doc in docs if doc]
-    joined = "\n".join(docs)
-    if len(joined) > RUN_LIMITS["corpus_max_chars"]:
-        raise ValueError(f"Corpus in {path.name} exceeds max size")
+def _split_docs(text: str, too_long_message: str) -> list[str]:
+    # Strip, drop blanks and track the "\n"-joined length in one pass, stopping at the limit.
+    docs: list[str] = []
+    joined_len = -1
+    for line in text.splitlines():
+        doc = line.strip()
+        if not doc:
+            continue
+        joined_len += len(doc) + 1
+        if joined_len > _CORPUS_MAX_CHARS:
+            raise ValueError(too_long_message)
+        docs.append(doc)
     return docs
 
 
-def load_builtin_pack_docs(pack_id: str) -> list[str]:
-    if pack_id not in BUILTIN_PACK_IDS:
-        raise ValueError(f"Unknown pack: {pack_id}")
+def _read_docs(path: Path) -> list[str]:
+    return _split_docs(path.read_text(encoding="utf-8"), f"Corpus in {path.name} exceeds max size")
+
+
+@lru_cache(maxsize=len(BUILTIN_PACK_IDS))
+def _load_pack_docs(pack_id: str) -> tuple[str, ...]:
+    # Pack files are static for the life of the process; read and split each one once.
     path = PACK_DIR / f"{pack_id}.txt"
     if not path.exists():
         raise FileNotFoundError(path)
-    return _read_docs(path)
+    return tuple(_read_docs(path))
+
+
+def load_builtin_pack_docs(pack_id: str) -> list[str]:
+    if pack_id not in BUILTIN_PACK_IDS:
+        raise ValueError(f"Unknown pack: {pack_id}")
+    return list(_load_pack_docs(pack_id))
+
+
+@lru_cache(maxsize=1)
+def _pack_descriptors() -> tuple[PackDescriptor, ...]:
+    return tuple(_build_pack_descriptors())
 
 
 def build_pack_descriptors() -> list[PackDescriptor]:
+    return [descriptor.model_copy() for descriptor in _pack_descriptors()]
+
+
+def _build_pack_descriptors() -> list[PackDescriptor]:
     descriptors: list[PackDescriptor] = []
     for pack_id in BUILTIN_PACK_IDS:
         docs = load_builtin_pack_docs(pack_id)
@@ -71,12 +99,9 @@ def build_pack_descriptors() -> list[PackDescriptor]:
 
 
 def docs_from_text(text: str) -> list[str]:
-    docs = [line.strip() for line in text.splitlines() if line.strip()]
+    docs = _split_docs(text, "Uploaded corpus exceeds character limit")
     if not docs:
         raise ValueError("Uploaded corpus contains no non-empty documents")
-    joined = "\n".join(docs)
-    if len(joined) > RUN_LIMITS["corpus_max_chars"]:
-        raise ValueError("Uploaded corpus exceeds character limit")
     return docs
 
 
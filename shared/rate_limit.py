@@ -1,10 +1,44 @@
 from __future__ import annotations
 
+import time
+
 from redis import Redis
+from redis.client import Pipeline
+from redis.commands.core import Script
+
+# INCR and the bucket's EXPIRE in one atomic EVALSHA. Bytes source lets the
+# script be created without a bound client; callers pass theirs at call time.
+_RATE_LIMIT_SCRIPT = Script(
+    None,
+    b"""
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+""",
+)
+
+
+def bucket_key(key: str, window_seconds: int, now: float | None = None) -> str:
+    """Name the counter for the current fixed window, e.g. ``rl:runs:1.2.3.4:29000123``."""
+    current = time.time() if now is None else now
+    return f"{key}:{int(current) // window_seconds}"
+
+
+def queue_rate_limit(pipe: Pipeline, key: str, window_seconds: int) -> None:
+    """Queue the rate-limit commands on ``pipe``; the INCR count is the first reply."""
+    bucket = bucket_key(key, window_seconds)
+    # Pipelined scripts cost an extra SCRIPT EXISTS round-trip in redis-py, so the
+    # batched path keeps plain INCR + EXPIRE NX inside the pipeline's MULTI/EXEC.
+    # NX makes the EXPIRE a no-op once the bucket has its TTL.
+    pipe.incr(bucket)
+    pipe.expire(bucket, 2 * window_seconds, nx=True)
 
 
 def allow_request(redis: Redis, key: str, limit: int, window_seconds: int) -> bool:
-    count = redis.incr(key)
-    if count == 1:
-        redis.expire(key, window_seconds)
-    return count <= limit
+    bucket = bucket_key(key, window_seconds)
+    # Each window has its own key, so the TTL is only set when the bucket is created
+    # and stale buckets age out on their own.
+    count = _RATE_LIMIT_SCRIPT(keys=[bucket], args=[2 * window_seconds], client=redis)
+    return int(count) <= limit
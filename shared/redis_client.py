@@ -2,16 +2,68 @@ from __future__ import annotations
 
 from functools import lru_cache
 
-from redis import Redis
+from redis import BlockingConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import ConnectionPool as AsyncConnectionPool
+from redis.asyncio import Redis as AsyncRedis
 
-from shared.settings import REDIS_URL
+from shared.settings import REDIS_MAX_CONNECTIONS, REDIS_POOL_TIMEOUT_SECONDS, REDIS_URL
+
+
+@lru_cache(maxsize=2)
+def _connection_pool(decode_responses: bool) -> BlockingConnectionPool:
+    # decode_responses is baked into each connection, so text and binary clients need
+    # separate pools.
+    # The blocking pool hands out the most recently returned idle connection (LIFO) and waits
+    # for a free slot under bursts instead of failing once max_connections is reached.
+    return BlockingConnectionPool.from_url(
+        REDIS_URL,
+        decode_responses=decode_responses,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
 
 
 @lru_cache(maxsize=1)
 def get_redis() -> Redis:
-    return Redis.from_url(REDIS_URL, decode_responses=True)
+    return Redis(connection_pool=_connection_pool(True))
 
 
 @lru_cache(maxsize=1)
 def get_redis_raw() -> Redis:
-    return Redis.from_url(REDIS_URL, decode_responses=False)
+    return Redis(connection_pool=_connection_pool(False))
+
+
+@lru_cache(maxsize=2)
+def _async_connection_pool(decode_responses: bool) -> AsyncBlockingConnectionPool:
+    # Same sizing as the sync pools; these connections live on the API's event loop.
+    return AsyncBlockingConnectionPool.from_url(
+        REDIS_URL,
+        decode_responses=decode_responses,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        timeout=REDIS_POOL_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> AsyncRedis:
+    return AsyncRedis(connection_pool=_async_connection_pool(True))
+
+
+@lru_cache(maxsize=1)
+def get_async_redis_raw() -> AsyncRedis:
+    return AsyncRedis(connection_pool=_async_connection_pool(False))
+
+
+@lru_cache(maxsize=1)
+def get_async_redis_pubsub() -> AsyncRedis:
+    # Every open SSE stream holds one subscribed connection for its whole life. They come
+    # from this unbounded pool so viewers never exhaust the bounded pool that serves reads;
+    # the practical ceiling is the Redis server's maxclients.
+    return AsyncRedis(
+        connection_pool=AsyncConnectionPool.from_url(
+            REDIS_URL, decode_responses=True, health_check_interval=30
+        )
+    )
@@ -3,6 +3,11 @@ from __future__ import annotations
 import os
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+REDIS_POOL_TIMEOUT_SECONDS = float(os.getenv("REDIS_POOL_TIMEOUT_SECONDS", "5"))
 SENTRY_DSN = os.getenv("SENTRY_DSN", "")
 API_RATE_LIMIT_PER_MINUTE = int(os.getenv("API_RATE_LIMIT_PER_MINUTE", "30"))
 CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "http://localhost:5173")
+CORS_ALLOW_ORIGINS_LIST = tuple(
+    origin.strip() for origin in CORS_ALLOW_ORIGINS.split(",") if origin.strip()
+)
@@ -1,29 +1,124 @@
 from __future__ import annotations
 
-import json
-import uuid
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import UTC, datetime
 from typing import Any
 
+import lz4.frame
+import orjson
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import PubSub as AsyncPubSub
+from redis.client import Pipeline
+from redis.exceptions import ResponseError
 
-from shared.constants import ACTIVE_STATUSES, RUN_LIMITS
-from shared.types import RunConfig, RunSummary
+from shared.constants import ACTIVE_STATUSES, RUN_LIMITS, TERMINAL_STATUSES
+from shared.packs import docs_from_text
+from shared.types import RUN_SUMMARY_ADAPTER, RUN_SUMMARY_LIST_ADAPTER, RunConfig, RunSummary
+
+
+# Sorted set of queued/running run IDs scored by when they stop counting as active, so runs
+# whose worker died without a terminal status age out with their metadata.
+ACTIVE_RUNS_KEY = "runs:active_by_expiry"
+EVENT_PAGE_SIZE = 256
+_TTL_SECONDS = RUN_LIMITS["ttl_seconds"]
+# Events at least this large (attention matrices, op graphs) are stored LZ4-compressed.
+EVENT_COMPRESS_MIN_BYTES = 4096
+# XADD rejects an explicit ID at or below the stream's last one with this message.
+_STREAM_ORDER_ERROR = "equal or smaller than the target stream top item"
+_APPEND_EVENT_ATTEMPTS = 8
+_SUBSCRIBE_CONFIRM_SECONDS = 5.0
+
+
+def _event_fields(event_type: str, data: bytes) -> dict[str, str | bytes]:
+    if len(data) >= EVENT_COMPRESS_MIN_BYTES:
+        return {"type": event_type, "data_lz4": lz4.frame.compress(data)}
+    return {"type": event_type, "data": data}
+
+
+def _event_data(fields: dict[bytes, bytes]) -> bytes:
+    compressed = fields.get(b"data_lz4")
+    if compressed is not None:
+        return lz4.frame.decompress(compressed)
+    return fields[b"data"]
+
+
+def _polled_events(
+    entries: list[tuple[bytes, dict[bytes, bytes]]], status: bytes | None
+) -> tuple[list[dict[str, Any]], str | None]:
+    events = [
+        {
+            "seq": int(entry_id.partition(b"-")[0]),
+            "type": fields[b"type"].decode(),
+            "data": _event_data(fields).decode(),
+        }
+        for entry_id, fields in entries
+    ]
+    return events, status.decode() if status is not None else None
+
+
+class _RunCache:
+    """Bounded LRU of parsed runs; terminal runs no longer change, so they live longer."""
+
+    def __init__(self, maxsize: int = 512, active_ttl: float = 1.0, terminal_ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.active_ttl = active_ttl
+        self.terminal_ttl = terminal_ttl
+        self._entries: OrderedDict[str, tuple[float, RunSummary]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, run_id: str) -> RunSummary | None:
+        with self._lock:
+            entry = self._entries.get(run_id)
+            if entry is None:
+                return None
+            expires_at, run = entry
+            if expires_at <= time.monotonic():
+                del self._entries[run_id]
+                return None
+            self._entries.move_to_end(run_id)
+            return run
+
+    def put(self, run: RunSummary) -> None:
+        ttl = self.terminal_ttl if run.status in TERMINAL_STATUSES else self.active_ttl
+        with self._lock:
+            self._entries[run.run_id] = (time.monotonic() + ttl, run)
+            self._entries.move_to_end(run.run_id)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def discard(self, run_id: str) -> None:
+        with self._lock:
+            self._entries.pop(run_id, None)
 
 
 class RunStore:
-    def __init__(self, redis: Redis):
+    """Run, event and upload storage.
+
+    ``redis`` decodes responses and serves metadata and uploads; ``events_redis`` must not,
+    since event stream entries may hold compressed binary data.
+    """
+
+    def __init__(self, redis: Redis, events_redis: Redis):
         self.redis = redis
+        self.events_redis = events_redis
+        self._run_cache = _RunCache()
 
     def _meta_key(self, run_id: str) -> str:
         return f"run:{run_id}:meta"
 
     def _events_key(self, run_id: str) -> str:
-        return f"run:{run_id}:events"
+        return f"run:{run_id}:stream"
 
     def _seq_key(self, run_id: str) -> str:
         return f"run:{run_id}:seq"
 
+    def _events_channel(self, run_id: str) -> str:
+        return f"run:{run_id}:events"
+
     def _cancel_key(self, run_id: str) -> str:
         return f"run:{run_id}:cancel"
 
@@ -33,108 +128,189 @@ class RunStore:
     def _upload_meta_key(self, upload_id: str) -> str:
         return f"upload:{upload_id}:meta"
 
-    def _set_expiry(self, *keys: str) -> None:
+    def _set_expiry(self, pipe: Pipeline, *keys: str) -> None:
         for key in keys:
-            self.redis.expire(key, RUN_LIMITS["ttl_seconds"])
+            pipe.expire(key, _TTL_SECONDS)
 
     def create_run(self, pack_id: str, config: RunConfig) -> RunSummary:
-        run_id = uuid.uuid4().hex
-        now = datetime.now(UTC)
+        run_id = secrets.token_hex(16)
+        # Epoch seconds at microsecond precision, the same resolution pydantic parses back.
+        now = round(time.time(), 6)
         meta = {
             "run_id": run_id,
             "status": "queued",
             "pack_id": pack_id,
+            # JSON rather than a binary codec: the meta hash is read through the decoding
+            # client, and orjson decodes a config faster than msgpack does.
             "config_json": config.model_dump_json(),
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat(),
+            "created_at": str(now),
+            "updated_at": str(now),
             "error": "",
         }
-        self.redis.sadd("runs:index", run_id)
-        self.redis.hset(self._meta_key(run_id), mapping=meta)
-        self.redis.set(self._seq_key(run_id), 0)
-        self._set_expiry("runs:index", self._meta_key(run_id), self._seq_key(run_id))
-        return RunSummary(
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.sadd("runs:index", run_id)
+        pipe.zadd(ACTIVE_RUNS_KEY, {run_id: now + _TTL_SECONDS})
+        pipe.hset(self._meta_key(run_id), mapping=meta)
+        pipe.set(self._seq_key(run_id), 0)
+        self._set_expiry(
+            pipe, "runs:index", ACTIVE_RUNS_KEY, self._meta_key(run_id), self._seq_key(run_id)
+        )
+        pipe.execute()
+        created_at = datetime.fromtimestamp(now, UTC)
+        run = RunSummary(
             run_id=run_id,
             status="queued",
             pack_id=pack_id,
             config=config,
-            created_at=now,
-            updated_at=now,
+            created_at=created_at,
+            updated_at=created_at,
             error=None,
         )
+        self._run_cache.put(run)
+        return run
+
+    def get_run(self, run_id: str, use_cache: bool = True) -> RunSummary | None:
+        """Return the run, served from a short-lived local cache unless ``use_cache`` is False.
 
-    def get_run(self, run_id: str) -> RunSummary | None:
+        Other processes (the worker) update status too, so a cached active run can be up to
+        a second stale; pass ``use_cache=False`` before acting on the current status.
+        """
+        if use_cache:
+            cached = self._run_cache.get(run_id)
+            if cached is not None:
+                return cached
         raw = self.redis.hgetall(self._meta_key(run_id))
         if not raw:
             return None
-        error = raw.get("error") or None
-        return RunSummary(
-            run_id=raw["run_id"],
-            status=raw["status"],
-            pack_id=raw["pack_id"],
-            config=RunConfig.model_validate_json(raw["config_json"]),
-            created_at=datetime.fromisoformat(raw["created_at"]),
-            updated_at=datetime.fromisoformat(raw["updated_at"]),
-            error=error,
-        )
+        run = RUN_SUMMARY_ADAPTER.validate_python(self._summary_fields(raw))
+        self._run_cache.put(run)
+        return run
+
+    def _summary_fields(self, raw: dict[str, str]) -> dict[str, Any]:
+        # Timestamps stay strings; pydantic parses them while validating the row. New rows hold
+        # epoch seconds, rows written before that hold ISO-8601, and both validate to UTC.
+        return {
+            "run_id": raw["run_id"],
+            "status": raw["status"],
+            "pack_id": raw["pack_id"],
+            "config": orjson.loads(raw["config_json"]),
+            "created_at": raw["created_at"],
+            "updated_at": raw["updated_at"],
+            "error": raw.get("error") or None,
+        }
 
     def update_run_status(self, run_id: str, status: str, error: str | None = None) -> None:
-        now = datetime.now(UTC).isoformat()
+        now = time.time()
         mapping: dict[str, Any] = {
             "status": status,
-            "updated_at": now,
+            "updated_at": f"{now:.6f}",
             "error": error or "",
         }
-        self.redis.hset(self._meta_key(run_id), mapping=mapping)
-        self._set_expiry(self._meta_key(run_id), self._events_key(run_id), self._seq_key(run_id))
+        # Status and active-set membership change together so count_active_runs never drifts.
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self._meta_key(run_id), mapping=mapping)
+        if status in ACTIVE_STATUSES:
+            pipe.zadd(ACTIVE_RUNS_KEY, {run_id: now + _TTL_SECONDS})
+        else:
+            pipe.zrem(ACTIVE_RUNS_KEY, run_id)
+        self._set_expiry(
+            pipe, self._meta_key(run_id), self._events_key(run_id), self._seq_key(run_id)
+        )
+        pipe.publish(self._events_channel(run_id), status)
+        pipe.execute()
+        self._run_cache.discard(run_id)
 
     def list_runs(self) -> list[RunSummary]:
         run_ids = sorted(self.redis.smembers("runs:index"))
-        runs: list[RunSummary] = []
+        pipe = self.redis.pipeline(transaction=False)
         for run_id in run_ids:
-            run = self.get_run(run_id)
-            if run is not None:
-                runs.append(run)
-        return runs
+            pipe.hgetall(self._meta_key(run_id))
+        rows = [self._summary_fields(raw) for raw in pipe.execute() if raw]
+        return RUN_SUMMARY_LIST_ADAPTER.validate_python(rows)
 
     def count_active_runs(self) -> int:
-        return sum(1 for run in self.list_runs() if run.status in ACTIVE_STATUSES)
+        pipe = self.redis.pipeline(transaction=False)
+        self.count_active_runs_cmd(pipe)
+        return int(pipe.execute()[-1])
+
+    def count_active_runs_cmd(self, pipe: Pipeline) -> None:
+        """Queue the active-run count on ``pipe`` so callers can batch it with other reads.
+
+        Adds two replies: the number of expired entries pruned, then the count.
+        """
+        pipe.zremrangebyscore(ACTIVE_RUNS_KEY, "-inf", time.time())
+        pipe.zcard(ACTIVE_RUNS_KEY)
 
     def append_event(self, run_id: str, event_type: str, payload: dict[str, Any]) -> dict[str, Any]:
-        seq = int(self.redis.incr(self._seq_key(run_id)))
-        event = {
-            "seq": seq,
-            "type": event_type,
-            "timestamp": datetime.now(UTC).isoformat(),
-            "payload": payload,
-        }
-        self.redis.rpush(self._events_key(run_id), json.dumps(event))
-        self._set_expiry(self._events_key(run_id), self._seq_key(run_id))
-        return event
+        for _ in range(_APPEND_EVENT_ATTEMPTS):
+            # The seq is embedded in the event JSON, so it has to be allocated first;
+            # everything after that goes out in one MULTI/EXEC.
+            seq = int(self.events_redis.incr(self._seq_key(run_id)))
+            event = {
+                "seq": seq,
+                "type": event_type,
+                # orjson renders the datetime as ISO-8601 natively, several times faster
+                # than isoformat(); the stored JSON is unchanged.
+                "timestamp": datetime.now(UTC),
+                "payload": payload,
+            }
+            pipe = self.events_redis.pipeline(transaction=True)
+            # Stream IDs are ``{seq}-0`` so replay from a seq is a plain XRANGE.
+            pipe.xadd(
+                self._events_key(run_id),
+                _event_fields(event_type, orjson.dumps(event, option=orjson.OPT_SERIALIZE_NUMPY)),
+                id=f"{seq}-0",
+            )
+            self._set_expiry(pipe, self._events_key(run_id), self._seq_key(run_id))
+            pipe.publish(self._events_channel(run_id), seq)
+            added, *_ = pipe.execute(raise_on_error=False)
+            if not isinstance(added, ResponseError):
+                # Callers get the same ISO string that was stored.
+                event["timestamp"] = event["timestamp"].isoformat()
+                return event
+            if _STREAM_ORDER_ERROR not in str(added):
+                raise added
+            # A concurrent writer (e.g. cancel vs. worker) appended a later seq first;
+            # take a fresh seq so the stream stays strictly ordered.
+        raise added
 
     def list_events(self, run_id: str, from_seq: int = 1) -> list[dict[str, Any]]:
-        start_index = max(from_seq - 1, 0)
-        raw_events = self.redis.lrange(self._events_key(run_id), start_index, -1)
-        events: list[dict[str, Any]] = []
-        for item in raw_events:
-            event = json.loads(item)
-            if event["seq"] >= from_seq:
-                events.append(event)
-        return events
+        entries = self.events_redis.xrange(self._events_key(run_id), min=f"{max(from_seq, 1)}-0")
+        return [orjson.loads(_event_data(fields)) for _, fields in entries]
+
+    def poll_events(
+        self,
+        run_id: str,
+        from_seq: int = 1,
+        limit: int = EVENT_PAGE_SIZE,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Read up to ``limit`` events from ``from_seq`` and the run status in one MULTI/EXEC.
+
+        Both reads see the same snapshot, so an empty page with a terminal status means the
+        run's final event has already been read.
+
+        Events are returned as ``{"seq", "type", "data"}`` where ``data`` is the event JSON
+        exactly as stored, so SSE frames can be assembled without re-serializing. Callers
+        page through a backlog by polling again from the last seq + 1.
+        """
+        pipe = self.events_redis.pipeline(transaction=True)
+        pipe.xrange(self._events_key(run_id), min=f"{max(from_seq, 1)}-0", count=limit)
+        pipe.hget(self._meta_key(run_id), "status")
+        return _polled_events(*pipe.execute())
 
     def request_cancel(self, run_id: str) -> None:
-        self.redis.set(self._cancel_key(run_id), "1", ex=RUN_LIMITS["ttl_seconds"])
+        self.redis.set(self._cancel_key(run_id), "1", ex=_TTL_SECONDS)
 
     def is_cancel_requested(self, run_id: str) -> bool:
         return self.redis.get(self._cancel_key(run_id)) == "1"
 
     def create_upload(self, text: str) -> tuple[str, datetime, int, int]:
-        upload_id = uuid.uuid4().hex
-        docs = [line for line in text.splitlines() if line.strip()]
-        now = datetime.now(UTC)
-        expires_at = now.timestamp() + RUN_LIMITS["ttl_seconds"]
-        self.redis.set(self._upload_key(upload_id), text, ex=RUN_LIMITS["ttl_seconds"])
-        self.redis.hset(
+        upload_id = secrets.token_hex(16)
+        docs = docs_from_text(text)
+        expires_at = time.time() + _TTL_SECONDS
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.set(self._upload_key(upload_id), text, ex=_TTL_SECONDS)
+        pipe.hset(
             self._upload_meta_key(upload_id),
             mapping={
                 "document_count": str(len(docs)),
@@ -142,9 +318,75 @@ class RunStore:
                 "expires_at": str(expires_at),
             },
         )
-        self._set_expiry(self._upload_meta_key(upload_id))
+        self._set_expiry(pipe, self._upload_meta_key(upload_id))
+        pipe.execute()
         return upload_id, datetime.fromtimestamp(expires_at, UTC), len(docs), len(text)
 
+    def upload_exists_cmd(self, pipe: Pipeline, upload_id: str) -> None:
+        """Queue an existence check for the upload without transferring its text."""
+        pipe.exists(self._upload_key(upload_id))
+
     def get_upload_text(self, upload_id: str) -> str | None:
         text = self.redis.get(self._upload_key(upload_id))
         return text if text else None
+
+
+class AsyncRunStore:
+    """redis.asyncio reads for the API's async endpoints (the event stream).
+
+    Shares key layout and the run cache with ``store``, so writes made through the sync
+    store invalidate what this side serves. The worker only ever uses ``RunStore``.
+    Subscriptions use ``pubsub_redis`` (default ``redis``), which should sit on its own
+    connection pool: each one pins a connection for as long as its stream is open.
+    """
+
+    def __init__(
+        self,
+        store: RunStore,
+        redis: AsyncRedis,
+        events_redis: AsyncRedis,
+        pubsub_redis: AsyncRedis | None = None,
+    ):
+        self.store = store
+        self.redis = redis
+        self.events_redis = events_redis
+        self.pubsub_redis = pubsub_redis or redis
+
+    async def get_run(self, run_id: str, use_cache: bool = True) -> RunSummary | None:
+        run_cache = self.store._run_cache
+        if use_cache:
+            cached = run_cache.get(run_id)
+            if cached is not None:
+                return cached
+        raw = await self.redis.hgetall(self.store._meta_key(run_id))
+        if not raw:
+            return None
+        run = RUN_SUMMARY_ADAPTER.validate_python(self.store._summary_fields(raw))
+        run_cache.put(run)
+        return run
+
+    async def poll_events(
+        self,
+        run_id: str,
+        from_seq: int = 1,
+        limit: int = EVENT_PAGE_SIZE,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """Async ``RunStore.poll_events``."""
+        pipe = self.events_redis.pipeline(transaction=True)
+        pipe.xrange(self.store._events_key(run_id), min=f"{max(from_seq, 1)}-0", count=limit)
+        pipe.hget(self.store._meta_key(run_id), "status")
+        return _polled_events(*await pipe.execute())
+
+    async def subscribe_events(self, run_id: str) -> AsyncPubSub:
+        """Subscribe to the run's notification channel (one message per event or status change)."""
+        pubsub = self.pubsub_redis.pubsub()
+        await pubsub.subscribe(self.store._events_channel(run_id))
+        # SUBSCRIBE only takes effect once Redis confirms it; wait for that so callers can
+        # read the stream next without missing a notification published in between.
+        deadline = time.monotonic() + _SUBSCRIBE_CONFIRM_SECONDS
+        while (remaining := deadline - time.monotonic()) > 0:
+            message = await pubsub.get_message(timeout=remaining)
+            if message is not None and message["type"] == "subscribe":
+                return pubsub
+        await pubsub.aclose()
+        raise TimeoutError(f"no subscribe confirmation for run {run_id}")
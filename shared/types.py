@@ -1,19 +1,19 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Any
+from typing import Any, Literal
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, TypeAdapter, model_validator
 
 from shared.constants import RUN_LIMITS
 
 
 class RunConfig(BaseModel):
-    n_embd: int = Field(default=32, ge=8)
-    n_head: int = Field(default=4, ge=1)
-    n_layer: int = Field(default=1, ge=1)
-    block_size: int = Field(default=16, ge=4)
-    num_steps: int = Field(default=300, ge=1)
+    n_embd: int = Field(default=32, ge=8, le=RUN_LIMITS["n_embd_max"])
+    n_head: int = Field(default=4, ge=1, le=RUN_LIMITS["n_head_max"])
+    n_layer: int = Field(default=1, ge=1, le=RUN_LIMITS["n_layer_max"])
+    block_size: int = Field(default=16, ge=4, le=RUN_LIMITS["block_size_max"])
+    num_steps: int = Field(default=300, ge=1, le=RUN_LIMITS["num_steps_max"])
     learning_rate: float = Field(default=0.01, gt=0)
     temperature: float = Field(default=0.8, gt=0)
     seed: int = Field(default=42)
@@ -22,19 +22,12 @@ class RunConfig(BaseModel):
     top_k: int = Field(default=5, ge=1, le=20)
     op_graph_token_index: int = Field(default=0, ge=0)
     op_graph_step_interval: int = Field(default=25, ge=1)
+    # Storage dtype for weights, activations and optimizer state; float64 is kept for checks.
+    dtype: Literal["float32", "float64"] = "float32"
 
+    # Upper bounds live in the Field constraints; only the cross-field check needs Python.
     @model_validator(mode="after")
     def validate_limits(self) -> "RunConfig":
-        if self.n_embd > RUN_LIMITS["n_embd_max"]:
-            raise ValueError(f"n_embd exceeds {RUN_LIMITS['n_embd_max']}")
-        if self.n_head > RUN_LIMITS["n_head_max"]:
-            raise ValueError(f"n_head exceeds {RUN_LIMITS['n_head_max']}")
-        if self.n_layer > RUN_LIMITS["n_layer_max"]:
-            raise ValueError(f"n_layer exceeds {RUN_LIMITS['n_layer_max']}")
-        if self.block_size > RUN_LIMITS["block_size_max"]:
-            raise ValueError(f"block_size exceeds {RUN_LIMITS['block_size_max']}")
-        if self.num_steps > RUN_LIMITS["num_steps_max"]:
-            raise ValueError(f"num_steps exceeds {RUN_LIMITS['num_steps_max']}")
         if self.n_embd % self.n_head != 0:
             raise ValueError("n_embd must be divisible by n_head")
         return self
@@ -55,6 +48,11 @@ class RunSummary(BaseModel):
     error: str | None = None
 
 
+# Built once so store reads validate whole rows (and batches of rows) in a single core call.
+RUN_SUMMARY_ADAPTER = TypeAdapter(RunSummary)
+RUN_SUMMARY_LIST_ADAPTER = TypeAdapter(list[RunSummary])
+
+
 class PackDescriptor(BaseModel):
     pack_id: str
     title: str
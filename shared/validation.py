@@ -1,24 +1,35 @@
 from __future__ import annotations
 
+import re
 from pathlib import Path
 
 from shared.constants import CONTENT_BLOCKLIST, RUN_LIMITS, UPLOAD_ALLOWED_EXTENSIONS
 
+_UPLOAD_MAX_BYTES = RUN_LIMITS["upload_max_bytes"]
+_UPLOAD_MAX_UNIQUE_CHARS = RUN_LIMITS["upload_max_unique_chars"]
+_CORPUS_MAX_CHARS = RUN_LIMITS["corpus_max_chars"]
+_ASCII_WITHIN_LIMIT = _UPLOAD_MAX_UNIQUE_CHARS >= 128
+
+_BLOCKLIST_BY_UPPER = {blocked.upper(): blocked for blocked in CONTENT_BLOCKLIST}
+# One alternation scans the text once for every needle; longest first so overlaps
+# report the most specific entry.
+_BLOCKLIST_PATTERN = re.compile(
+    "|".join(re.escape(needle) for needle in sorted(_BLOCKLIST_BY_UPPER, key=len, reverse=True))
+)
+
 
 class UploadValidationError(ValueError):
     pass
 
 
-def validate_upload(filename: str, content: bytes) -> str:
+def validate_upload(filename: str, content: bytes | bytearray) -> str:
     extension = Path(filename).suffix.lower()
     if extension not in UPLOAD_ALLOWED_EXTENSIONS:
         allowed = ", ".join(sorted(UPLOAD_ALLOWED_EXTENSIONS))
         raise UploadValidationError(f"Only {allowed} files are allowed")
 
-    if len(content) > RUN_LIMITS["upload_max_bytes"]:
-        raise UploadValidationError(
-            f"File exceeds {RUN_LIMITS['upload_max_bytes']} bytes"
-        )
+    if len(content) > _UPLOAD_MAX_BYTES:
+        raise UploadValidationError(f"File exceeds {_UPLOAD_MAX_BYTES} bytes")
 
     try:
         decoded = content.decode("utf-8")
@@ -29,20 +40,19 @@ def validate_upload(filename: str, content: bytes) -> str:
     if not text:
         raise UploadValidationError("File is empty")
 
-    unique_chars = len(set(text))
-    if unique_chars > RUN_LIMITS["upload_max_unique_chars"]:
-        raise UploadValidationError(
-            f"Too many unique characters: {unique_chars} > {RUN_LIMITS['upload_max_unique_chars']}"
-        )
-
-    upper_text = text.upper()
-    for blocked in CONTENT_BLOCKLIST:
-        if blocked.upper() in upper_text:
-            raise UploadValidationError(f"Blocked content detected: {blocked}")
-
-    if len(text) > RUN_LIMITS["corpus_max_chars"]:
-        raise UploadValidationError(
-            f"Corpus exceeds {RUN_LIMITS['corpus_max_chars']} characters"
-        )
+    # ASCII text can hold at most 128 distinct characters, so the set is only needed otherwise.
+    if not (_ASCII_WITHIN_LIMIT and text.isascii()):
+        unique_chars = len(set(text))
+        if unique_chars > _UPLOAD_MAX_UNIQUE_CHARS:
+            raise UploadValidationError(
+                f"Too many unique characters: {unique_chars} > {_UPLOAD_MAX_UNIQUE_CHARS}"
+            )
+
+    match = _BLOCKLIST_PATTERN.search(text.upper())
+    if match:
+        raise UploadValidationError(f"Blocked content detected: {_BLOCKLIST_BY_UPPER[match.group(0)]}")
+
+    if len(text) > _CORPUS_MAX_CHARS:
+        raise UploadValidationError(f"Corpus exceeds {_CORPUS_MAX_CHARS} characters")
 
     return text
@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import threading
+import time
 
 import fakeredis
 from fastapi.testclient import TestClient
+from starlette.requests import Request
 
 from api.main import create_app
+from shared.constants import RUN_LIMITS
 from shared.packs import resolve_docs
-from shared.store import RunStore
+from shared.store import AsyncRunStore, RunStore
 from shared.types import RunConfig
 from worker.trainer import train_tiny_gpt
 
@@ -53,6 +58,24 @@ class InlineQueue:
         return "inline-job"
 
 
+def _stores() -> tuple[RunStore, AsyncRunStore]:
+    server = fakeredis.FakeServer()
+    store = RunStore(
+        fakeredis.FakeRedis(server=server, decode_responses=True),
+        fakeredis.FakeRedis(server=server),
+    )
+    async_store = AsyncRunStore(
+        store,
+        fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+        fakeredis.FakeAsyncRedis(server=server),
+    )
+    return store, async_store
+
+
+def _store() -> RunStore:
+    return _stores()[0]
+
+
 def _small_config() -> dict:
     return RunConfig(
         n_embd=8,
@@ -66,9 +89,8 @@ def _small_config() -> dict:
 
 
 def test_run_lifecycle_and_event_stream() -> None:
-    redis = fakeredis.FakeRedis(decode_responses=True)
-    store = RunStore(redis)
-    app = create_app(store=store, queue=InlineQueue(store))
+    store, async_store = _stores()
+    app = create_app(store=store, queue=InlineQueue(store), async_store=async_store)
     client = TestClient(app)
 
     create_response = client.post(
@@ -96,8 +118,7 @@ def test_run_lifecycle_and_event_stream() -> None:
 
 
 def test_upload_and_run_flow() -> None:
-    redis = fakeredis.FakeRedis(decode_responses=True)
-    store = RunStore(redis)
+    store = _store()
     app = create_app(store=store, queue=InlineQueue(store))
     client = TestClient(app)
 
@@ -121,8 +142,7 @@ def test_upload_and_run_flow() -> None:
 
 
 def test_pack_list_includes_new_builtin_ids() -> None:
-    redis = fakeredis.FakeRedis(decode_responses=True)
-    store = RunStore(redis)
+    store = _store()
     app = create_app(store=store, queue=InlineQueue(store))
     client = TestClient(app)
 
@@ -131,3 +151,177 @@ def test_pack_list_includes_new_builtin_ids() -> None:
     pack_ids = {pack["pack_id"] for pack in response.json()}
     assert "arithmetic" in pack_ids
     assert "json" in pack_ids
+
+
+class NoopQueue:
+    def enqueue_run(self, run_id: str) -> str:
+        return f"noop-{run_id}"
+
+
+def test_concurrent_run_limit_counts_only_active_runs() -> None:
+    store = _store()
+    app = create_app(store=store, queue=NoopQueue())
+    client = TestClient(app)
+
+    run_ids = []
+    for _ in range(RUN_LIMITS["concurrent_runs_max"]):
+        response = client.post("/api/v1/runs", json={"pack_id": "regex", "config": _small_config()})
+        assert response.status_code == 200
+        run_ids.append(response.json()["run_id"])
+
+    blocked = client.post("/api/v1/runs", json={"pack_id": "regex", "config": _small_config()})
+    assert blocked.status_code == 429
+
+    store.update_run_status(run_ids[0], "completed")
+    assert store.count_active_runs() == RUN_LIMITS["concurrent_runs_max"] - 1
+
+    allowed = client.post("/api/v1/runs", json={"pack_id": "regex", "config": _small_config()})
+    assert allowed.status_code == 200
+
+
+def test_event_stream_wakes_on_published_events() -> None:
+    store, async_store = _stores()
+    app = create_app(store=store, queue=NoopQueue(), async_store=async_store)
+    client = TestClient(app)
+
+    run_id = client.post(
+        "/api/v1/runs",
+        json={"pack_id": "regex", "config": _small_config()},
+    ).json()["run_id"]
+
+    def finish_run() -> None:
+        time.sleep(0.2)
+        store.append_event(run_id, "run.started", {})
+        store.append_event(run_id, "run.completed", {})
+        store.update_run_status(run_id, "completed")
+
+    worker = threading.Thread(target=finish_run)
+    started = time.monotonic()
+    worker.start()
+    with client.stream("GET", f"/api/v1/runs/{run_id}/events") as stream_response:
+        text = "".join(chunk for chunk in stream_response.iter_text())
+    worker.join()
+
+    assert "event: run.started" in text
+    assert "event: run.completed" in text
+    assert time.monotonic() - started < 5
+
+
+def test_subscribe_events_returns_once_subscription_is_active() -> None:
+    store, async_store = _stores()
+    run = store.create_run(pack_id="regex", config=RunConfig(**_small_config()))
+
+    async def scenario() -> dict | None:
+        pubsub = await async_store.subscribe_events(run.run_id)
+        store.append_event(run.run_id, "run.started", {})
+        message = await pubsub.get_message(timeout=1.0)
+        await pubsub.aclose()
+        return message
+
+    message = asyncio.run(scenario())
+
+    assert message is not None
+    assert message["type"] == "message"
+
+
+def test_event_stream_wakes_on_event_published_right_after_subscribe() -> None:
+    store, async_store = _stores()
+    app = create_app(store=store, queue=NoopQueue(), async_store=async_store)
+    client = TestClient(app)
+    run_id = client.post(
+        "/api/v1/runs",
+        json={"pack_id": "regex", "config": _small_config()},
+    ).json()["run_id"]
+    poll_events = async_store.poll_events
+
+    async def poll_then_finish(*args, **kwargs):
+        # The run finishes between the stream's first read and its wait for a notification.
+        result = await poll_events(*args, **kwargs)
+        if not result[0]:
+            store.append_event(run_id, "run.completed", {})
+            store.update_run_status(run_id, "completed")
+        return result
+
+    async_store.poll_events = poll_then_finish
+    started = time.monotonic()
+    with client.stream("GET", f"/api/v1/runs/{run_id}/events") as stream_response:
+        text = "".join(chunk for chunk in stream_response.iter_text())
+
+    assert "event: run.completed" in text
+    # Well under SSE_KEEPALIVE_SECONDS: the notification woke the stream.
+    assert time.monotonic() - started < 5
+
+
+def test_cancel_reaches_open_event_stream() -> None:
+    store, async_store = _stores()
+    app = create_app(store=store, queue=NoopQueue(), async_store=async_store)
+    client = TestClient(app)
+
+    run_id = client.post(
+        "/api/v1/runs",
+        json={"pack_id": "regex", "config": _small_config()},
+    ).json()["run_id"]
+
+    def cancel_run() -> None:
+        time.sleep(0.2)
+        assert client.post(f"/api/v1/runs/{run_id}/cancel").status_code == 200
+
+    worker = threading.Thread(target=cancel_run)
+    worker.start()
+    with client.stream("GET", f"/api/v1/runs/{run_id}/events") as stream_response:
+        text = "".join(chunk for chunk in stream_response.iter_text())
+    worker.join()
+
+    assert "event: run.canceled" in text
+
+
+def test_event_stream_cancellation_leaves_no_pending_tasks() -> None:
+    store, async_store = _stores()
+    app = create_app(store=store, queue=NoopQueue(), async_store=async_store)
+    run = store.create_run(pack_id="regex", config=RunConfig(**_small_config()))
+    stream_events = next(
+        route.endpoint
+        for route in app.routes
+        if getattr(route, "path", "") == "/api/v1/runs/{run_id}/events"
+    )
+
+    async def never_disconnects() -> dict:
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def scenario() -> list[asyncio.Task]:
+        request = Request({"type": "http", "method": "GET", "headers": []}, never_disconnects)
+        response = await stream_events(run.run_id, request, 1)
+        # What Starlette does on disconnect: cancel the task iterating the body.
+        reader = asyncio.create_task(response.body_iterator.__anext__())
+        await asyncio.sleep(0.2)
+        reader.cancel()
+        await asyncio.wait({reader})
+        await asyncio.sleep(0)
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_run_for_missing_upload_is_not_found() -> None:
+    store = _store()
+    client = TestClient(create_app(store=store, queue=NoopQueue()))
+
+    response = client.post(
+        "/api/v1/runs",
+        json={"pack_id": "upload:doesnotexist", "config": _small_config()},
+    )
+    assert response.status_code == 404
+    assert store.count_active_runs() == 0
+
+
+def test_upload_rejects_oversized_file() -> None:
+    store = _store()
+    client = TestClient(create_app(store=store, queue=NoopQueue()))
+
+    oversized = b"a\n" * (RUN_LIMITS["upload_max_bytes"] // 2 + 1)
+    response = client.post(
+        "/api/v1/uploads",
+        files={"file": ("big.txt", oversized, "text/plain")},
+    )
+    assert response.status_code == 413
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from worker.trainer import Value
+import sys
+
+import numpy as np
+
+from worker.trainer import Tensor, Value, _serialize_graph, einsum, linear, rmsnorm, softmax
 
 
 def test_value_backward_matches_finite_difference() -> None:
@@ -16,3 +20,78 @@ def test_value_backward_matches_finite_difference() -> None:
     numerical_grad = (y_plus - y_minus) / (2 * eps)
 
     assert abs(x.grad - numerical_grad) < 1e-4
+
+
+def test_tensor_backward_handles_graphs_deeper_than_recursion_limit() -> None:
+    x = Tensor([1.0, 2.0])
+    y = x
+    for _ in range(sys.getrecursionlimit() * 2):
+        y = y * 1.0
+    y.mean().backward()
+
+    assert np.allclose(x.grad, [0.5, 0.5])
+
+
+def test_tensor_ops_match_scalar_reference() -> None:
+    w_rows = [[0.3, -0.2, 0.5], [0.1, 0.4, -0.6]]
+    x_vals = [1.5, -0.5, 2.0]
+
+    w_scalar = [[Value(w) for w in row] for row in w_rows]
+    x_scalar = [Value(x) for x in x_vals]
+    h = rmsnorm(linear(x_scalar, w_scalar))
+    loss_scalar = -softmax(h)[1].log()
+    loss_scalar.backward()
+
+    w = Tensor(w_rows)
+    x = Tensor(x_vals)
+    loss = (w @ x).rmsnorm().cross_entropy(1)
+    loss.backward()
+
+    assert abs(float(loss.data) - loss_scalar.data) < 1e-9
+    assert np.allclose(w.grad, [[wi.grad for wi in row] for row in w_scalar])
+    assert np.allclose(x.grad, [xi.grad for xi in x_scalar])
+
+
+def test_batched_tensor_ops_match_finite_difference() -> None:
+    rng = np.random.default_rng(0)
+    table = rng.normal(size=(4, 3))
+    tokens = np.array([2, 0, 2])
+    targets = np.array([1, 3, 0])
+    causal = np.tri(3, dtype=bool)
+
+    def forward(leaf: Tensor) -> Tensor:
+        # The gather repeats token 2, and the leaf is used again as the output projection.
+        x = leaf[tokens].rmsnorm()
+        attn = einsum("te,se->ts", x, x).softmax(causal)
+        logits = einsum("ts,se->te", attn, x) @ leaf.T
+        return logits.cross_entropy(targets).mean()
+
+    leaf = Tensor(table)
+    forward(leaf).backward()
+
+    eps = 1e-6
+    numerical = np.zeros_like(table)
+    for index in np.ndindex(table.shape):
+        bumped = table.copy()
+        bumped[index] += eps
+        plus = float(forward(Tensor(bumped)).data)
+        bumped[index] -= 2 * eps
+        minus = float(forward(Tensor(bumped)).data)
+        numerical[index] = (plus - minus) / (2 * eps)
+    assert np.allclose(leaf.grad, numerical, atol=1e-6)
+
+
+def test_serialize_graph_keeps_nodes_nearest_the_root() -> None:
+    x = Tensor([1.0, 2.0])
+    y = x
+    for _ in range(500):
+        y = y * 2.0
+    root = y.mean()
+
+    graph = _serialize_graph(root, max_nodes=10)
+
+    ids = [node["id"] for node in graph["nodes"]]
+    assert len(ids) == 10
+    assert ids[-1] == root.id
+    assert ids == sorted(ids)
+    assert len(graph["edges"]) == 9
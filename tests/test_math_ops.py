@@ -37,3 +37,45 @@ def test_attention_weights_are_normalized() -> None:
     for position_entry in token_attention:
         for head_weights in position_entry["heads"]:
             assert abs(sum(head_weights) - 1.0) < 1e-5
+
+
+def test_float32_run_tracks_float64_run() -> None:
+    results = {}
+    for dtype in ("float32", "float64"):
+        config = RunConfig(
+            n_embd=8,
+            n_head=2,
+            n_layer=1,
+            block_size=4,
+            num_steps=3,
+            sample_interval=3,
+            op_graph_step_interval=3,
+            dtype=dtype,
+        )
+        results[dtype] = train_tiny_gpt(["ab", "ac"], config, lambda *_: None, lambda: False)
+
+    assert abs(results["float32"].final_loss - results["float64"].final_loss) < 1e-4
+
+
+def test_op_graph_root_carries_its_share_of_the_loss_gradient() -> None:
+    captured: list[dict] = []
+
+    def emit(event_type: str, payload: dict) -> None:
+        captured.append({"type": event_type, "payload": payload})
+
+    config = RunConfig(
+        n_embd=8,
+        n_head=2,
+        n_layer=1,
+        block_size=4,
+        num_steps=1,
+        sample_interval=1,
+        op_graph_step_interval=1,
+    )
+    train_tiny_gpt(["abc"], config, emit, lambda: False)
+
+    backward = next(event for event in captured if event["type"] == "step.backward")
+    root = backward["payload"]["op_graph"]["nodes"][-1]
+    # "abc" gives 4 positions, and the loss is their mean.
+    assert root["op"] == "slice"
+    assert abs(root["grad"] - 0.25) < 1e-6
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import fakeredis
+import pytest
+
+import shared.rate_limit as rate_limit
+from shared.rate_limit import allow_request, bucket_key, queue_rate_limit
+
+FROZEN_NOW = 1_700_000_000.0
+
+
+@pytest.fixture(autouse=True)
+def _frozen_clock(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(rate_limit.time, "time", lambda: FROZEN_NOW)
+
+
+def test_allow_request_enforces_limit_and_sets_window() -> None:
+    redis = fakeredis.FakeRedis(decode_responses=True)
+
+    results = [allow_request(redis, key="rl:test", limit=2, window_seconds=60) for _ in range(3)]
+
+    assert results == [True, True, False]
+    assert 60 < redis.ttl(bucket_key("rl:test", 60)) <= 120
+
+
+def test_allow_request_resets_in_next_window(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    assert allow_request(redis, key="rl:test", limit=1, window_seconds=60)
+    assert not allow_request(redis, key="rl:test", limit=1, window_seconds=60)
+
+    monkeypatch.setattr(rate_limit.time, "time", lambda: FROZEN_NOW + 60)
+    assert allow_request(redis, key="rl:test", limit=1, window_seconds=60)
+
+
+def test_queued_rate_limit_sets_window_once() -> None:
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    key = bucket_key("rl:queued", 60)
+
+    counts = []
+    for _ in range(2):
+        pipe = redis.pipeline()
+        queue_rate_limit(pipe, key="rl:queued", window_seconds=60)
+        count, _ = pipe.execute()
+        counts.append(count)
+        if count == 1:
+            redis.expire(key, 30)
+
+    assert counts == [1, 2]
+    # EXPIRE NX must not push the window out on later hits.
+    assert 0 < redis.ttl(key) <= 30
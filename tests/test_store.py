@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime
+
+import fakeredis
+import pytest
+from redis.exceptions import ResponseError
+
+from shared.store import ACTIVE_RUNS_KEY, EVENT_COMPRESS_MIN_BYTES, RunStore
+from shared.types import RunConfig
+
+
+def _store() -> RunStore:
+    server = fakeredis.FakeServer()
+    return RunStore(
+        fakeredis.FakeRedis(server=server, decode_responses=True),
+        fakeredis.FakeRedis(server=server),
+    )
+
+
+def test_list_events_replays_from_seq() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    appended = [store.append_event(run.run_id, "step.loss", {"step": i + 1}) for i in range(5)]
+
+    events = store.list_events(run.run_id, from_seq=3)
+    assert [event["seq"] for event in events] == [3, 4, 5]
+    assert events[0]["payload"] == {"step": 3}
+    assert datetime.fromisoformat(events[0]["timestamp"]).tzinfo is not None
+    assert events[0]["timestamp"] == appended[2]["timestamp"]
+
+
+def test_large_events_are_stored_compressed() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    weights = [round(i / 997, 6) for i in range(EVENT_COMPRESS_MIN_BYTES)]
+    store.append_event(run.run_id, "step.attention", {"weights": weights})
+    store.append_event(run.run_id, "step.loss", {"loss": 1.0})
+
+    entries = store.events_redis.xrange(f"run:{run.run_id}:stream")
+    assert [sorted(fields) for _, fields in entries] == [
+        [b"data_lz4", b"type"],
+        [b"data", b"type"],
+    ]
+    assert store.list_events(run.run_id)[0]["payload"] == {"weights": weights}
+    events, _ = store.poll_events(run.run_id)
+    assert json.loads(events[0]["data"])["payload"] == {"weights": weights}
+
+
+def test_poll_events_returns_status_with_events() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    store.append_event(run.run_id, "run.started", {})
+
+    events, status = store.poll_events(run.run_id, from_seq=1)
+    assert [(event["seq"], event["type"]) for event in events] == [(1, "run.started")]
+    assert json.loads(events[0]["data"])["type"] == "run.started"
+    assert status == "queued"
+
+
+def test_active_run_count_tracks_status_transitions() -> None:
+    store = _store()
+    first = store.create_run(pack_id="regex", config=RunConfig())
+    second = store.create_run(pack_id="regex", config=RunConfig())
+    assert store.count_active_runs() == 2
+
+    store.update_run_status(first.run_id, "running")
+    store.update_run_status(first.run_id, "completed")
+    store.update_run_status(first.run_id, "completed")
+    assert store.count_active_runs() == 1
+
+    store.update_run_status(second.run_id, "canceled")
+    assert store.count_active_runs() == 0
+
+
+def test_active_run_count_drops_runs_past_their_ttl() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    store.update_run_status(run.run_id, "running")
+    # A worker that died mid-run never reports a terminal status.
+    store.redis.zadd(ACTIVE_RUNS_KEY, {run.run_id: time.time() - 1})
+
+    assert store.count_active_runs() == 0
+
+
+def test_append_event_skips_seqs_taken_by_concurrent_writer() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    store.append_event(run.run_id, "run.started", {})
+    # Simulate another writer that allocated seq 2 and 3 and landed seq 3 first.
+    store.redis.incr(f"run:{run.run_id}:seq", 2)
+    store.redis.xadd(f"run:{run.run_id}:stream", {"type": "x", "data": "{}"}, id="3-0")
+    store.redis.decr(f"run:{run.run_id}:seq", 2)
+
+    event = store.append_event(run.run_id, "run.canceled", {})
+
+    assert event["seq"] == 4
+    assert [e["seq"] for e in store.list_events(run.run_id, from_seq=4)] == [4]
+
+
+def test_append_event_raises_errors_other_than_stream_ordering() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    store.redis.set(f"run:{run.run_id}:stream", "not a stream")
+
+    with pytest.raises(ResponseError, match="WRONGTYPE"):
+        store.append_event(run.run_id, "run.started", {})
+
+    assert store.redis.get(f"run:{run.run_id}:seq") == "1"
+
+
+def test_writes_set_ttl_on_run_and_upload_keys() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    store.append_event(run.run_id, "run.started", {})
+    upload_id, *_ = store.create_upload("hello\nworld")
+
+    for key in (
+        f"run:{run.run_id}:meta",
+        f"run:{run.run_id}:seq",
+        f"run:{run.run_id}:stream",
+        f"upload:{upload_id}:text",
+        f"upload:{upload_id}:meta",
+    ):
+        assert store.redis.ttl(key) > 0, key
+
+
+def test_list_runs_skips_expired_runs() -> None:
+    store = _store()
+    kept = store.create_run(pack_id="regex", config=RunConfig())
+    expired = store.create_run(pack_id="json", config=RunConfig())
+    store.redis.delete(f"run:{expired.run_id}:meta")
+
+    runs = store.list_runs()
+
+    assert [run.run_id for run in runs] == [kept.run_id]
+    assert runs[0].pack_id == "regex"
+
+
+def test_get_run_cache_is_invalidated_locally_and_bypassable() -> None:
+    api_store = _store()
+    worker_store = RunStore(api_store.redis, api_store.events_redis)
+    run = api_store.create_run(pack_id="regex", config=RunConfig())
+    assert api_store.get_run(run.run_id).status == "queued"
+
+    worker_store.update_run_status(run.run_id, "running")
+    assert api_store.get_run(run.run_id).status == "queued"
+    assert api_store.get_run(run.run_id, use_cache=False).status == "running"
+
+    api_store.update_run_status(run.run_id, "canceled")
+    assert api_store.get_run(run.run_id).status == "canceled"
+
+
+def test_poll_events_pages_through_backlog() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    for i in range(5):
+        store.append_event(run.run_id, "step.loss", {"step": i + 1})
+
+    first, _ = store.poll_events(run.run_id, from_seq=1, limit=2)
+    second, _ = store.poll_events(run.run_id, from_seq=first[-1]["seq"] + 1, limit=2)
+    rest, _ = store.poll_events(run.run_id, from_seq=second[-1]["seq"] + 1, limit=2)
+
+    assert [e["seq"] for e in first + second + rest] == [1, 2, 3, 4, 5]
+
+
+def test_run_timestamps_round_trip_as_epoch_and_legacy_iso() -> None:
+    store = _store()
+    run = store.create_run(pack_id="regex", config=RunConfig())
+    stored = store.redis.hget(f"run:{run.run_id}:meta", "created_at")
+    assert float(stored) == run.created_at.timestamp()
+    assert store.get_run(run.run_id, use_cache=False).created_at == run.created_at
+
+    store.redis.hset(f"run:{run.run_id}:meta", "updated_at", "2025-01-02T03:04:05+00:00")
+    assert store.get_run(run.run_id, use_cache=False).updated_at.isoformat() == (
+        "2025-01-02T03:04:05+00:00"
+    )
@@ -19,3 +19,14 @@ def test_validate_upload_rejects_wrong_extension() -> None:
 def test_validate_upload_rejects_blocked_content() -> None:
     with pytest.raises(UploadValidationError, match="Blocked"):
         validate_upload("corpus.txt", b"DROP DATABASE users;")
+
+
+def test_validate_upload_blocklist_is_case_insensitive() -> None:
+    with pytest.raises(UploadValidationError, match="<script>"):
+        validate_upload("corpus.txt", b"hello\n<ScRiPt>alert(1)")
+
+
+def test_validate_upload_rejects_too_many_unique_characters() -> None:
+    text = "".join(chr(0x4E00 + i) for i in range(300)).encode()
+    with pytest.raises(UploadValidationError, match="300 > 256"):
+        validate_upload("corpus.txt", text)
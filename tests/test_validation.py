@@ -13,3 +13,8 @@ def test_run_config_rejects_head_embedding_mismatch() -> None:
 def test_run_config_rejects_excessive_num_steps() -> None:
     with pytest.raises(ValueError, match="num_steps"):
         RunConfig(num_steps=5000)
+
+
+def test_run_config_accepts_limits_inclusive() -> None:
+    config = RunConfig(n_embd=64, n_head=8, n_layer=2, block_size=64, num_steps=2000)
+    assert config.num_steps == 2000
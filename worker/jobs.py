@@ -5,7 +5,7 @@ import logging
 import sentry_sdk
 
 from shared.packs import resolve_docs
-from shared.redis_client import get_redis
+from shared.redis_client import get_redis, get_redis_raw
 from shared.store import RunStore
 from worker.trainer import train_tiny_gpt
 
@@ -13,8 +13,7 @@ logger = logging.getLogger(__name__)
 
 
 def train_run_job(run_id: str) -> None:
-    redis = get_redis()
-    store = RunStore(redis)
+    store = RunStore(get_redis(), get_redis_raw())
     run = store.get_run(run_id)
     if run is None:
         logger.error("run_not_found", extra={"run_id": run_id})
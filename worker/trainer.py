@@ -2,12 +2,37 @@ from __future__ import annotations
 
 import math
 import random
+from collections import deque
 from dataclasses import dataclass
 from typing import Callable
 
+import numpy as np
+
 from shared.types import RunConfig
 
 
+def _topo_order(root: Tensor) -> list[Tensor]:
+    """Children-first order of every node reachable from ``root``.
+
+    Iterative post-order DFS, so deep graphs don't hit the recursion limit; visited nodes
+    are tracked by their integer ``id``. Produces the same order as the recursive form.
+    """
+    topo = []
+    visited = {root.id}
+    stack = [(root, iter(root._children))]
+    while stack:
+        node, children = stack[-1]
+        for child in children:
+            if child.id not in visited:
+                visited.add(child.id)
+                stack.append((child, iter(child._children)))
+                break
+        else:
+            stack.pop()
+            topo.append(node)
+    return topo
+
+
 class Value:
     __slots__ = ("id", "data", "grad", "_children", "_local_grads")
     _next_id = 1
@@ -80,6 +105,208 @@ class Value:
                 child.grad += local_grad * node.grad
 
 
+def _softmax_array(x: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+    # One buffer for shift, exp and normalise; pass ``out`` (which may be ``x``) to reuse one.
+    out = np.subtract(x, x.max(axis=-1, keepdims=True), out=out)
+    np.exp(out, out=out)
+    out /= out.sum(axis=-1, keepdims=True)
+    return out
+
+
+def _rmsnorm_scale(x: np.ndarray) -> np.ndarray:
+    # Per row of the last axis, kept as a trailing length-1 axis for broadcasting.
+    return (np.mean(x * x, axis=-1, keepdims=True) + 1e-5) ** -0.5
+
+
+def _rmsnorm_array(x: np.ndarray) -> np.ndarray:
+    return x * _rmsnorm_scale(x)
+
+
+class Tensor:
+    """Array-valued autograd node: one node per op rather than one per scalar."""
+
+    __slots__ = ("id", "data", "grad", "op", "_children", "_backward")
+    _next_id = 1
+
+    def __init__(self, data, children=(), op: str = "", backward=None):
+        self.id = Tensor._next_id
+        Tensor._next_id += 1
+        # Arrays keep their dtype (the run's float32/float64); Python numbers default to float64.
+        if isinstance(data, (np.ndarray, np.generic)):
+            self.data = np.asarray(data)
+        else:
+            self.data = np.asarray(data, dtype=np.float64)
+        self.grad: np.ndarray | None = None
+        self.op = op
+        self._children = children
+        # Reads ``self.grad`` and accumulates into the children; None for leaves.
+        self._backward = backward
+
+    @property
+    def shape(self) -> tuple[int, ...]:
+        return self.data.shape
+
+    def _accumulate(self, grad: np.ndarray) -> None:
+        if self._backward is None:
+            # Leaves own their gradient buffer (parameters hold a view into the flat one),
+            # so they copy the first contribution and add the rest in place.
+            if self.grad is None:
+                self.grad = np.array(grad)
+            else:
+                self.grad += grad
+        else:
+            # Never in place: the incoming array may be shared with another node.
+            self.grad = grad if self.grad is None else self.grad + grad
+
+    def __add__(self, other: Tensor) -> Tensor:
+        def backward():
+            self._accumulate(out.grad)
+            other._accumulate(out.grad)
+
+        out = Tensor(self.data + other.data, (self, other), "add", backward)
+        return out
+
+    def __mul__(self, scalar: float) -> Tensor:
+        def backward():
+            self._accumulate(out.grad * scalar)
+
+        out = Tensor(self.data * scalar, (self,), "scale", backward)
+        return out
+
+    __rmul__ = __mul__
+
+    def __matmul__(self, other: Tensor) -> Tensor:
+        a, b = self.data, other.data
+
+        def backward():
+            g = out.grad
+            if a.ndim == 1:
+                # (n,) @ (n, m) -> (m,)
+                self._accumulate(b @ g)
+                other._accumulate(np.outer(a, g))
+            elif b.ndim == 1:
+                # (m, n) @ (n,) -> (m,)
+                self._accumulate(np.outer(g, b))
+                other._accumulate(a.T @ g)
+            else:
+                self._accumulate(g @ b.T)
+                other._accumulate(a.T @ g)
+
+        out = Tensor(a @ b, (self, other), "matmul", backward)
+        return out
+
+    @property
+    def T(self) -> Tensor:
+        def backward():
+            self._accumulate(out.grad.T)
+
+        out = Tensor(self.data.T, (self,), "transpose", backward)
+        return out
+
+    def reshape(self, *shape: int) -> Tensor:
+        def backward():
+            self._accumulate(out.grad.reshape(self.shape))
+
+        out = Tensor(self.data.reshape(shape), (self,), "reshape", backward)
+        return out
+
+    def __getitem__(self, index) -> Tensor:
+        # np.add.at so repeated indices (the same token twice in an embedding gather) all count.
+        def backward():
+            if self._backward is None and self.grad is not None:
+                # Scatter straight into the leaf's buffer.
+                np.add.at(self.grad, index, out.grad)
+                return
+            grad = np.zeros_like(self.data)
+            np.add.at(grad, index, out.grad)
+            self._accumulate(grad)
+
+        out = Tensor(self.data[index], (self,), "slice", backward)
+        return out
+
+    def relu(self) -> Tensor:
+        def backward():
+            self._accumulate(out.grad * (self.data > 0.0))
+
+        out = Tensor(np.maximum(self.data, 0.0), (self,), "relu", backward)
+        return out
+
+    def rmsnorm(self) -> Tensor:
+        x = self.data
+        scale = _rmsnorm_scale(x)
+
+        def backward():
+            g = out.grad
+            x_dot_g = np.sum(x * g, axis=-1, keepdims=True)
+            self._accumulate(scale * g - (scale**3) * x * (x_dot_g / x.shape[-1]))
+
+        out = Tensor(x * scale, (self,), "rmsnorm", backward)
+        return out
+
+    def softmax(self, mask: np.ndarray | None = None) -> Tensor:
+        """Softmax over the last axis; entries where ``mask`` is False get zero weight."""
+        probs = _softmax_array(self.data if mask is None else np.where(mask, self.data, -np.inf))
+
+        def backward():
+            g = out.grad
+            self._accumulate(probs * (g - np.sum(g * probs, axis=-1, keepdims=True)))
+
+        out = Tensor(probs, (self,), "softmax", backward)
+        return out
+
+    def cross_entropy(self, target: int | np.ndarray) -> Tensor:
+        """Negative log-likelihood of ``target`` under softmax over the last axis, as one op.
+
+        ``(V,)`` logits take one target id; ``(T, V)`` logits take ``T`` ids and give ``T`` losses.
+        """
+        if self.data.ndim == 1:
+            picked = target
+        else:
+            picked = (np.arange(self.data.shape[0]), target)
+        shifted = self.data - self.data.max(axis=-1, keepdims=True)
+        log_total = np.log(np.exp(shifted).sum(axis=-1))
+
+        def backward():
+            grad = np.exp(shifted - log_total[..., None])
+            grad[picked] -= 1.0
+            self._accumulate(grad * np.asarray(out.grad)[..., None])
+
+        out = Tensor(log_total - shifted[picked], (self,), "cross_entropy", backward)
+        return out
+
+    def mean(self) -> Tensor:
+        def backward():
+            self._accumulate(np.full_like(self.data, out.grad / self.data.size))
+
+        out = Tensor(self.data.mean(), (self,), "mean", backward)
+        return out
+
+    def backward(self):
+        topo = _topo_order(self)
+        self.grad = np.ones_like(self.data)
+        for node in reversed(topo):
+            if node._backward is not None:
+                node._backward()
+
+
+def einsum(spec: str, a: Tensor, b: Tensor) -> Tensor:
+    """Two-operand ``np.einsum``, e.g. ``einsum("thd,shd->ths", q, k)``.
+
+    Every index of an operand must appear in the output or in the other operand, so each
+    input's gradient is itself an einsum of the output gradient with the other input.
+    """
+    inputs, out_sub = spec.split("->")
+    a_sub, b_sub = inputs.split(",")
+
+    def backward():
+        g = out.grad
+        a._accumulate(np.einsum(f"{out_sub},{b_sub}->{a_sub}", g, b.data))
+        b._accumulate(np.einsum(f"{out_sub},{a_sub}->{b_sub}", g, a.data))
+
+    out = Tensor(np.einsum(spec, a.data, b.data), (a, b), "einsum", backward)
+    return out
+
+
 @dataclass
 class TrainResult:
     status: str
@@ -88,6 +315,7 @@ class TrainResult:
     vocab_size: int
 
 
+# Scalar reference implementations over ``Value``; the trainer runs the ``Tensor`` ops.
 def linear(x: list[Value], w: list[list[Value]]) -> list[Value]:
     return [sum(wi * xi for wi, xi in zip(wo, x)) for wo in w]
 
@@ -105,68 +333,151 @@ def rmsnorm(x: list[Value]) -> list[Value]:
     return [xi * scale for xi in x]
 
 
-def _matrix(nout: int, nin: int, std: float = 0.08) -> list[list[Value]]:
-    return [[Value(random.gauss(0.0, std)) for _ in range(nin)] for _ in range(nout)]
+PARAM_GROUPS = ("embeddings", "attention", "mlp", "lm_head")
+
+DTYPES = {"float32": np.float32, "float64": np.float64}
 
 
-def _build_state(vocab_size: int, config: RunConfig) -> dict[str, list[list[Value]]]:
-    state: dict[str, list[list[Value]]] = {
-        "wte": _matrix(vocab_size, config.n_embd),
-        "wpe": _matrix(config.block_size, config.n_embd),
-        "lm_head": _matrix(vocab_size, config.n_embd),
+def _matrix(
+    rng: np.random.Generator, nout: int, nin: int, dtype: type[np.floating], std: float = 0.08
+) -> Tensor:
+    # Drawn in float64 and cast, so both dtypes start from the same weights.
+    return Tensor(rng.normal(0.0, std, size=(nout, nin)).astype(dtype))
+
+
+def _build_state(vocab_size: int, config: RunConfig, rng: np.random.Generator) -> dict[str, Tensor]:
+    dtype = DTYPES[config.dtype]
+    state: dict[str, Tensor] = {
+        "wte": _matrix(rng, vocab_size, config.n_embd, dtype),
+        "wpe": _matrix(rng, config.block_size, config.n_embd, dtype),
+        "lm_head": _matrix(rng, vocab_size, config.n_embd, dtype),
     }
     for i in range(config.n_layer):
-        state[f"layer{i}.attn_wq"] = _matrix(config.n_embd, config.n_embd)
-        state[f"layer{i}.attn_wk"] = _matrix(config.n_embd, config.n_embd)
-        state[f"layer{i}.attn_wv"] = _matrix(config.n_embd, config.n_embd)
-        state[f"layer{i}.attn_wo"] = _matrix(config.n_embd, config.n_embd)
-        state[f"layer{i}.mlp_fc1"] = _matrix(4 * config.n_embd, config.n_embd)
-        state[f"layer{i}.mlp_fc2"] = _matrix(config.n_embd, 4 * config.n_embd)
+        # Q, K and V projections stacked row-wise so each layer does one matmul for all three.
+        state[f"layer{i}.attn_wqkv"] = _matrix(rng, 3 * config.n_embd, config.n_embd, dtype)
+        state[f"layer{i}.attn_wo"] = _matrix(rng, config.n_embd, config.n_embd, dtype)
+        state[f"layer{i}.mlp_fc1"] = _matrix(rng, 4 * config.n_embd, config.n_embd, dtype)
+        state[f"layer{i}.mlp_fc2"] = _matrix(rng, config.n_embd, 4 * config.n_embd, dtype)
     return state
 
 
+def _param_group(name: str) -> str:
+    if name in {"wte", "wpe"}:
+        return "embeddings"
+    if ".attn_" in name:
+        return "attention"
+    if ".mlp_" in name:
+        return "mlp"
+    return "lm_head"
+
+
 def _flatten_params(
-    state: dict[str, list[list[Value]]],
-) -> tuple[list[Value], dict[str, list[Value]], dict[int, str]]:
-    all_params: list[Value] = []
-    groups = {"embeddings": [], "attention": [], "mlp": [], "lm_head": []}
-    param_group_by_id: dict[int, str] = {}
+    state: dict[str, Tensor],
+) -> tuple[np.ndarray, np.ndarray, dict[str, slice]]:
+    """Move every weight into one flat data buffer and a matching flat grad buffer.
+
+    Each tensor in ``state`` is rebound to views of the two buffers, so updating the flat
+    arrays updates the model. Parameters are laid out group by group, making each group's
+    share of the buffers a plain slice.
+    """
+    by_group: dict[str, list[Tensor]] = {group_name: [] for group_name in PARAM_GROUPS}
     for name, mat in state.items():
-        group_name = "lm_head"
-        if name in {"wte", "wpe"}:
-            group_name = "embeddings"
-        elif ".attn_" in name:
-            group_name = "attention"
-        elif ".mlp_" in name:
-            group_name = "mlp"
-
-        for row in mat:
-            for param in row:
-                all_params.append(param)
-                groups[group_name].append(param)
-                param_group_by_id[param.id] = group_name
-    return all_params, groups, param_group_by_id
-
-
-def _serialize_graph(root: Value, max_nodes: int = 160) -> dict[str, list[dict[str, float | int]]]:
-    topo: list[Value] = []
-    visited = set()
-
-    def build(node: Value):
-        if node not in visited:
-            visited.add(node)
-            for child in node._children:
-                build(child)
-            topo.append(node)
-
-    build(root)
-    trimmed = topo[-max_nodes:]
-    id_set = {node.id for node in trimmed}
+        by_group[_param_group(name)].append(mat)
+
+    total = sum(mat.data.size for mat in state.values())
+    dtype = np.result_type(*(mat.data for mat in state.values()))
+    flat_data = np.empty(total, dtype=dtype)
+    flat_grad = np.zeros(total, dtype=dtype)
+    group_slices: dict[str, slice] = {}
+    offset = 0
+    for group_name, mats in by_group.items():
+        group_start = offset
+        for mat in mats:
+            stop = offset + mat.data.size
+            flat_data[offset:stop] = mat.data.ravel()
+            mat.data = flat_data[offset:stop].reshape(mat.shape)
+            mat.grad = flat_grad[offset:stop].reshape(mat.shape)
+            offset = stop
+        group_slices[group_name] = slice(group_start, offset)
+    return flat_data, flat_grad, group_slices
+
+
+def _group_norms(flat: np.ndarray, group_slices: dict[str, slice]) -> dict[str, float]:
+    # sqrt(x . x) on each group's slice: same value as np.linalg.norm without its dispatch.
+    norms: dict[str, float] = {}
+    for group_name, group in group_slices.items():
+        values = flat[group]
+        norms[group_name] = round(math.sqrt(float(np.dot(values, values))), 6)
+    return norms
+
+
+def _adam_step(
+    data: np.ndarray,
+    grad: np.ndarray,
+    m: np.ndarray,
+    v: np.ndarray,
+    delta: np.ndarray,
+    step: int,
+    lr: float,
+    beta1: float,
+    beta2: float,
+    eps: float,
+) -> None:
+    """Apply one Adam update to ``data`` in place, leaving the applied step in ``delta``.
+
+    Every op writes into ``m``, ``v`` or the ``delta`` scratch buffer, so an update
+    allocates nothing however many parameters there are.
+    """
+    m *= beta1
+    np.multiply(grad, 1.0 - beta1, out=delta)
+    m += delta
+    v *= beta2
+    np.multiply(grad, grad, out=delta)
+    delta *= 1.0 - beta2
+    v += delta
+    # lr * m_hat / (sqrt(v_hat) + eps), with both bias corrections folded into scalars.
+    np.divide(v, 1.0 - beta2 ** (step + 1), out=delta)
+    np.sqrt(delta, out=delta)
+    delta += eps
+    np.divide(m, delta, out=delta)
+    delta *= lr / (1.0 - beta1 ** (step + 1))
+    data -= delta
+
+
+def _node_summary(array: np.ndarray | None) -> float:
+    # Scalars report themselves; larger tensors report their L2 norm.
+    if array is None:
+        return 0.0
+    if array.size == 1:
+        return round(float(array.item()), 6)
+    return round(float(np.linalg.norm(array)), 6)
+
+
+def _serialize_graph(
+    root: Tensor, max_nodes: int = 160
+) -> dict[str, list[dict[str, float | int | str]]]:
+    # Breadth-first from the loss, stopping once max_nodes are found, so the cost depends on
+    # max_nodes rather than on the size of the graph.
+    found: dict[int, Tensor] = {root.id: root}
+    frontier = deque([root])
+    while frontier and len(found) < max_nodes:
+        for child in frontier.popleft()._children:
+            if child.id not in found:
+                found[child.id] = child
+                frontier.append(child)
+                if len(found) == max_nodes:
+                    break
+    # Ids grow in creation order and children exist before their parents, so sorting by id
+    # is a topological order.
+    trimmed = sorted(found.values(), key=lambda node: node.id)
+    id_set = found.keys()
     nodes = [
         {
             "id": node.id,
-            "value": round(node.data, 6),
-            "grad": round(node.grad, 6),
+            "op": node.op or "param",
+            "shape": list(node.shape),
+            "value": _node_summary(node.data),
+            "grad": _node_summary(node.grad),
         }
         for node in trimmed
     ]
@@ -183,101 +494,173 @@ def _token_str(token_id: int, uchars: list[str], bos_id: int) -> str:
 
 
 def _top_k_probs(
-    probs: list[Value],
+    probs: np.ndarray,
     uchars: list[str],
     bos_id: int,
     k: int,
 ) -> list[dict[str, float | str]]:
-    ranked = sorted(enumerate(probs), key=lambda item: item[1].data, reverse=True)[:k]
+    # Partition out the k largest, then order just those by descending prob (ties by id).
+    top = np.argpartition(-probs, k - 1)[:k] if k < probs.size else np.arange(probs.size)
+    top = top[np.lexsort((top, -probs[top]))]
+    rounded = np.round(probs[top].astype(np.float64), 6)
     return [
         {
             "token_id": token_id,
             "token": _token_str(token_id, uchars, bos_id),
-            "prob": round(prob.data, 6),
+            "prob": prob,
         }
-        for token_id, prob in ranked
+        for token_id, prob in zip(top.tolist(), rounded.tolist())
     ]
 
 
-def _norm_for_values(values: list[float]) -> float:
-    return math.sqrt(sum(v * v for v in values))
+@dataclass(frozen=True, slots=True)
+class _GptWeights:
+    """Weights resolved once per run so a forward pass doesn't format and look up names.
+
+    Holds Tensors for training and plain arrays for sampling. ``layers`` is one
+    ``(attn_wqkv, attn_wo, mlp_fc1, mlp_fc2)`` tuple per layer.
+    """
+
+    wte: Tensor | np.ndarray
+    wpe: Tensor | np.ndarray
+    lm_head: Tensor | np.ndarray
+    layers: tuple[tuple[Tensor | np.ndarray, ...], ...]
+    n_head: int
+    head_dim: int
+    inv_sqrt_d: float
+
+    @classmethod
+    def from_state(cls, state: dict, config: RunConfig) -> _GptWeights:
+        head_dim = config.n_embd // config.n_head
+        return cls(
+            wte=state["wte"],
+            wpe=state["wpe"],
+            lm_head=state["lm_head"],
+            layers=tuple(
+                (
+                    state[f"layer{i}.attn_wqkv"],
+                    state[f"layer{i}.attn_wo"],
+                    state[f"layer{i}.mlp_fc1"],
+                    state[f"layer{i}.mlp_fc2"],
+                )
+                for i in range(config.n_layer)
+            ),
+            n_head=config.n_head,
+            head_dim=head_dim,
+            inv_sqrt_d=1.0 / math.sqrt(head_dim),
+        )
+
+
+def _gpt_forward(weights: _GptWeights, tokens: np.ndarray) -> tuple[Tensor, list[np.ndarray]]:
+    """Causal forward over all ``T`` positions of ``tokens`` at once.
+
+    Returns ``(T, vocab)`` logits and, per layer, the ``(T, n_head, T)`` attention weights.
+    """
+    n_head, head_dim = weights.n_head, weights.head_dim
+    n_embd = n_head * head_dim
+    n = len(tokens)
+    # Position t attends to positions <= t; broadcast over heads.
+    causal = np.tri(n, dtype=bool)[:, None, :]
+
+    x = weights.wte[tokens] + weights.wpe[:n]
+    x = x.rmsnorm()
+
+    attention_by_layer: list[np.ndarray] = []
+    for wqkv, wo, fc1, fc2 in weights.layers:
+        x_residual = x
+        qkv = (x.rmsnorm() @ wqkv.T).reshape(n, 3, n_head, head_dim)
+        # Scaling q once covers every head and key.
+        q = qkv[:, 0] * weights.inv_sqrt_d
+        k, v = qkv[:, 1], qkv[:, 2]
+        attn_weights = einsum("thd,shd->ths", q, k).softmax(causal)
+        attention_by_layer.append(attn_weights.data)
+        x_attn = einsum("ths,shd->thd", attn_weights, v).reshape(n, n_embd)
+        x = x_attn @ wo.T + x_residual
+
+        x_residual = x
+        x = (x.rmsnorm() @ fc1.T).relu()
+        x = x @ fc2.T + x_residual
+
+    return x @ weights.lm_head.T, attention_by_layer
+
+
+def _gpt_sample_forward(
+    weights: _GptWeights,
+    token_ids: np.ndarray,
+    pos_id: int,
+    keys: np.ndarray,
+    values: np.ndarray,
+) -> np.ndarray:
+    """Array-only forward for one position of every sample at once.
+
+    ``token_ids`` has one entry per sample; their K/V go into the preallocated
+    ``(n_layer, samples, n_head, block_size, head_dim)`` cache. Returns ``(samples, vocab)``.
+    """
+    n_head, head_dim = weights.n_head, weights.head_dim
+    n_samples = len(token_ids)
+    x = _rmsnorm_array(weights.wte[token_ids] + weights.wpe[pos_id])
+    for li, (wqkv, wo, fc1, fc2) in enumerate(weights.layers):
+        x_residual = x
+        qkv = (_rmsnorm_array(x) @ wqkv.T).reshape(n_samples, 3, n_head, head_dim)
+        # Scaling q once covers every key it is dotted with.
+        q = qkv[:, 0] * weights.inv_sqrt_d
+        keys[li, :, :, pos_id] = qkv[:, 1]
+        values[li, :, :, pos_id] = qkv[:, 2]
+        # (samples, n_head, t, head_dim): each head's cached keys/values are one contiguous block.
+        k_all = keys[li, :, :, : pos_id + 1]
+        v_all = values[li, :, :, : pos_id + 1]
+        # (samples, n_head, t) attention logits. Nothing reads the weights here, so the softmax
+        # normalisation is folded into the value sum: divide the (samples, n_head, head_dim)
+        # output once instead of normalising every weight.
+        attn_logits = np.einsum("shtd,shd->sht", k_all, q)
+        exps = np.exp(attn_logits - attn_logits.max(axis=-1, keepdims=True))
+        x_attn = np.einsum("sht,shtd->shd", exps, v_all) / exps.sum(axis=-1, keepdims=True)
+        x = x_attn.reshape(n_samples, n_head * head_dim) @ wo.T + x_residual
+
+        x_residual = x
+        x = np.maximum(_rmsnorm_array(x) @ fc1.T, 0.0)
+        x = x @ fc2.T + x_residual
+
+    return x @ weights.lm_head.T
 
 
 def _sample_sequences(
-    state: dict[str, list[list[Value]]],
+    state: dict[str, Tensor],
     config: RunConfig,
     uchars: list[str],
     bos_id: int,
 ) -> list[str]:
-    head_dim = config.n_embd // config.n_head
-
-    def gpt(
-        token_id: int,
-        pos_id: int,
-        keys: list[list[list[Value]]],
-        values: list[list[list[Value]]],
-    ) -> tuple[list[Value], list[list[float]]]:
-        tok_emb = state["wte"][token_id]
-        pos_emb = state["wpe"][pos_id]
-        x = [t + p for t, p in zip(tok_emb, pos_emb)]
-        x = rmsnorm(x)
-
-        attention_per_head: list[list[float]] = []
-        for li in range(config.n_layer):
-            x_residual = x
-            x = rmsnorm(x)
-            q = linear(x, state[f"layer{li}.attn_wq"])
-            k = linear(x, state[f"layer{li}.attn_wk"])
-            v = linear(x, state[f"layer{li}.attn_wv"])
-            keys[li].append(k)
-            values[li].append(v)
-            x_attn: list[Value] = []
-            for h in range(config.n_head):
-                start = h * head_dim
-                q_h = q[start : start + head_dim]
-                k_h = [ki[start : start + head_dim] for ki in keys[li]]
-                v_h = [vi[start : start + head_dim] for vi in values[li]]
-                attn_logits = [
-                    sum(q_h[j] * k_h[t][j] for j in range(head_dim)) / math.sqrt(head_dim)
-                    for t in range(len(k_h))
-                ]
-                attn_weights = softmax(attn_logits)
-                attention_per_head.append([round(w.data, 6) for w in attn_weights])
-                head_out = [
-                    sum(attn_weights[t] * v_h[t][j] for t in range(len(v_h)))
-                    for j in range(head_dim)
-                ]
-                x_attn.extend(head_out)
-            x = linear(x_attn, state[f"layer{li}.attn_wo"])
-            x = [a + b for a, b in zip(x, x_residual)]
-
-            x_residual = x
-            x = rmsnorm(x)
-            x = linear(x, state[f"layer{li}.mlp_fc1"])
-            x = [xi.relu() for xi in x]
-            x = linear(x, state[f"layer{li}.mlp_fc2"])
-            x = [a + b for a, b in zip(x, x_residual)]
-
-        logits = linear(x, state["lm_head"])
-        return logits, attention_per_head
-
-    samples: list[str] = []
-    for _ in range(config.sample_count):
-        keys = [[] for _ in range(config.n_layer)]
-        values = [[] for _ in range(config.n_layer)]
-        token_id = bos_id
-        chars: list[str] = []
-        for pos_id in range(config.block_size):
-            logits, _ = gpt(token_id, pos_id, keys, values)
-            probs = softmax([l / config.temperature for l in logits])
-            token_id = random.choices(
-                range(len(uchars) + 1), weights=[p.data for p in probs], k=1
-            )[0]
+    # Inference only, so this runs on the raw arrays without building a graph.
+    weights = _GptWeights.from_state({name: tensor.data for name, tensor in state.items()}, config)
+    dtype = weights.wte.dtype
+    n_samples = config.sample_count
+    token_choices = range(len(uchars) + 1)
+
+    # All samples decode in lockstep, one batched forward per position. Rows of samples that
+    # already hit BOS keep running but are ignored.
+    cache_shape = (config.n_layer, n_samples, weights.n_head, config.block_size, weights.head_dim)
+    keys = np.empty(cache_shape, dtype=dtype)
+    values = np.empty(cache_shape, dtype=dtype)
+    probs = np.empty((n_samples, len(uchars) + 1), dtype=dtype)
+    token_ids = np.full(n_samples, bos_id)
+
+    chars: list[list[str]] = [[] for _ in range(n_samples)]
+    active = set(range(n_samples))
+    for pos_id in range(config.block_size):
+        logits = _gpt_sample_forward(weights, token_ids, pos_id, keys, values)
+        np.multiply(logits, 1.0 / config.temperature, out=probs)
+        _softmax_array(probs, out=probs)
+        rows = probs.tolist()
+        for sample in sorted(active):
+            token_id = random.choices(token_choices, weights=rows[sample], k=1)[0]
             if token_id == bos_id:
-                break
-            chars.append(uchars[token_id])
-        samples.append("".join(chars))
-    return samples
+                active.discard(sample)
+                continue
+            chars[sample].append(uchars[token_id])
+            token_ids[sample] = token_id
+        if not active:
+            break
+    return ["".join(sample_chars) for sample_chars in chars]
 
 
 def train_tiny_gpt(
@@ -296,73 +679,28 @@ def train_tiny_gpt(
 
     bos_id = len(uchars)
     vocab_size = len(uchars) + 1
-    head_dim = config.n_embd // config.n_head
-    state = _build_state(vocab_size, config)
-    params, param_groups, param_group_by_id = _flatten_params(state)
+    char_to_id = {ch: i for i, ch in enumerate(uchars)}
+    # Tokenised once up front. Step i trains on doc i % len(docs), so docs past num_steps are
+    # never used, and a step only reads the first block_size + 1 tokens of its doc.
+    token_docs = [
+        np.array([bos_id] + [char_to_id[ch] for ch in doc[: config.block_size]] + [bos_id])
+        for doc in docs[: config.num_steps]
+    ]
+    state = _build_state(vocab_size, config, np.random.default_rng(config.seed))
+    flat_data, flat_grad, group_slices = _flatten_params(state)
+    weights = _GptWeights.from_state(state, config)
 
     learning_rate, beta1, beta2, eps_adam = config.learning_rate, 0.85, 0.99, 1e-8
-    m = [0.0] * len(params)
-    v = [0.0] * len(params)
-
-    def gpt(
-        token_id: int,
-        pos_id: int,
-        keys: list[list[list[Value]]],
-        values: list[list[list[Value]]],
-    ) -> tuple[list[Value], list[list[float]]]:
-        tok_emb = state["wte"][token_id]
-        pos_emb = state["wpe"][pos_id]
-        x = [t + p for t, p in zip(tok_emb, pos_emb)]
-        x = rmsnorm(x)
-
-        attention_per_head: list[list[float]] = []
-        for li in range(config.n_layer):
-            x_residual = x
-            x = rmsnorm(x)
-            q = linear(x, state[f"layer{li}.attn_wq"])
-            k = linear(x, state[f"layer{li}.attn_wk"])
-            v_layer = linear(x, state[f"layer{li}.attn_wv"])
-            keys[li].append(k)
-            values[li].append(v_layer)
-
-            x_attn: list[Value] = []
-            for h in range(config.n_head):
-                start = h * head_dim
-                q_h = q[start : start + head_dim]
-                k_h = [ki[start : start + head_dim] for ki in keys[li]]
-                v_h = [vi[start : start + head_dim] for vi in values[li]]
-
-                attn_logits = [
-                    sum(q_h[j] * k_h[t][j] for j in range(head_dim)) / math.sqrt(head_dim)
-                    for t in range(len(k_h))
-                ]
-                attn_weights = softmax(attn_logits)
-                attention_per_head.append([round(w.data, 6) for w in attn_weights])
-                head_out = [
-                    sum(attn_weights[t] * v_h[t][j] for t in range(len(v_h)))
-                    for j in range(head_dim)
-                ]
-                x_attn.extend(head_out)
-
-            x = linear(x_attn, state[f"layer{li}.attn_wo"])
-            x = [a + b for a, b in zip(x, x_residual)]
-
-            x_residual = x
-            x = rmsnorm(x)
-            x = linear(x, state[f"layer{li}.mlp_fc1"])
-            x = [xi.relu() for xi in x]
-            x = linear(x, state[f"layer{li}.mlp_fc2"])
-            x = [a + b for a, b in zip(x, x_residual)]
-
-        logits = linear(x, state["lm_head"])
-        return logits, attention_per_head
+    m = np.zeros_like(flat_data)
+    v = np.zeros_like(flat_data)
+    delta = np.empty_like(flat_data)
 
     emit_event(
         "run.started",
         {
             "vocab_size": vocab_size,
             "doc_count": len(docs),
-            "num_params": len(params),
+            "num_params": flat_data.size,
             "config": config.model_dump(mode="json"),
         },
     )
@@ -378,43 +716,41 @@ def train_tiny_gpt(
                 vocab_size=vocab_size,
             )
 
-        doc = docs[step % len(docs)]
-        tokens = [bos_id] + [uchars.index(ch) for ch in doc] + [bos_id]
+        tokens = token_docs[step % len(token_docs)]
         n = min(config.block_size, len(tokens) - 1)
-        keys = [[] for _ in range(config.n_layer)]
-        values = [[] for _ in range(config.n_layer)]
+        inputs, targets = tokens[:n], tokens[1 : n + 1]
+
+        logits, attention_by_layer = _gpt_forward(weights, inputs)
+        token_losses = logits.cross_entropy(targets)
+        loss = token_losses.mean()
+        last_loss = float(loss.data)
+        selected_token_loss: Tensor | None = None
+        if config.op_graph_token_index < n:
+            selected_token_loss = token_losses[config.op_graph_token_index]
 
-        losses: list[Value] = []
         token_summaries: list[dict] = []
         attention_by_token: list[dict] = []
-        selected_token_loss: Value | None = None
-
-        for pos_id in range(n):
-            token_id, target_id = tokens[pos_id], tokens[pos_id + 1]
-            logits, attention_heads = gpt(token_id, pos_id, keys, values)
-            probs = softmax(logits)
-            loss_t = -probs[target_id].log()
-            losses.append(loss_t)
-
+        probs = np.empty(vocab_size, dtype=flat_data.dtype)
+        for pos_id, (token_id, target_id) in enumerate(zip(inputs.tolist(), targets.tolist())):
             token_summaries.append(
                 {
                     "position": pos_id,
                     "input_token": _token_str(token_id, uchars, bos_id),
                     "target_token": _token_str(target_id, uchars, bos_id),
-                    "top_k": _top_k_probs(probs, uchars, bos_id, config.top_k),
+                    "top_k": _top_k_probs(
+                        _softmax_array(logits.data[pos_id], out=probs), uchars, bos_id, config.top_k
+                    ),
                 }
             )
+            # Rounded once per token for the payload, as float64 so float32 weights still
+            # serialise to short decimals; layers stack into one (n_layer * n_head, t) block.
+            heads = np.concatenate([layer[pos_id, :, : pos_id + 1] for layer in attention_by_layer])
             attention_by_token.append(
                 {
                     "position": pos_id,
-                    "heads": attention_heads,
+                    "heads": np.round(heads.astype(np.float64), 6).tolist(),
                 }
             )
-            if pos_id == config.op_graph_token_index:
-                selected_token_loss = loss_t
-
-        loss = (1.0 / n) * sum(losses)
-        last_loss = loss.data
 
         emit_event(
             "step.forward",
@@ -434,19 +770,17 @@ def train_tiny_gpt(
             "step.loss",
             {
                 "step": step + 1,
-                "loss": round(loss.data, 6),
+                "loss": round(last_loss, 6),
             },
         )
 
         loss.backward()
+        if selected_token_loss is not None:
+            # The slice is a view for the op graph, not part of the loss; give it the
+            # gradient its row received through the mean.
+            selected_token_loss.grad = token_losses.grad[config.op_graph_token_index]
 
-        grad_norms = {
-            group_name: round(
-                _norm_for_values([param.grad for param in group_params]),
-                6,
-            )
-            for group_name, group_params in param_groups.items()
-        }
+        grad_norms = _group_norms(flat_grad, group_slices)
 
         op_graph: dict | None = None
         if (
@@ -465,24 +799,11 @@ def train_tiny_gpt(
         )
 
         lr_t = learning_rate * (1.0 - (step / config.num_steps))
-        delta_by_group = {"embeddings": [], "attention": [], "mlp": [], "lm_head": []}
-
-        for i, param in enumerate(params):
-            m[i] = beta1 * m[i] + (1.0 - beta1) * param.grad
-            v[i] = beta2 * v[i] + (1.0 - beta2) * (param.grad**2)
-            m_hat = m[i] / (1.0 - beta1 ** (step + 1))
-            v_hat = v[i] / (1.0 - beta2 ** (step + 1))
-            delta = lr_t * m_hat / (math.sqrt(v_hat) + eps_adam)
-            param.data -= delta
-
-            group_name = param_group_by_id[param.id]
-            delta_by_group[group_name].append(delta)
-            param.grad = 0.0
-
-        update_norms = {
-            group_name: round(_norm_for_values(deltas), 6)
-            for group_name, deltas in delta_by_group.items()
-        }
+        # In place, so every parameter view sees the update.
+        _adam_step(flat_data, flat_grad, m, v, delta, step, lr_t, beta1, beta2, eps_adam)
+        flat_grad.fill(0.0)
+
+        update_norms = _group_norms(delta, group_slices)
         emit_event(
             "step.update",
             {